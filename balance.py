@@ -0,0 +1,217 @@
+"""
+Monte-Carlo balancing tool. Plays large batches of headless rounds with simulated players
+and reports how often each kind of player wins, loses or leaves the cat in the dust on every difficulty.
+
+Usage:
+    python balance.py --rounds 100000 --difficulty-map 1=1,2=0.74,3=0.5 --bands 2:5,5:4,9:3,15:2
+"""
+
+# Command line interface
+import argparse
+
+# Parallel batches
+from multiprocessing import Pool, cpu_count
+from itertools import islice
+
+# Simulated player behaviour
+import random
+
+# Better type hinting
+from typing import *
+
+# Core game logic
+import game_scrambled as game
+
+
+class PlayerModel():
+    """Simulated player. Answer times are log-normally distributed around the median,
+    and every input is independently a wrong answer or a skip at the given rates.
+
+    Members:
+        name (str): Name of the player model, used in the report.
+        answer_time_median (float): Median time in seconds to answer an easy question.
+        answer_time_spread (float): Spread (log-normal sigma) of the answer time.
+        wrong_rate (float): Chance that an input is a wrong answer.
+        skip_rate (float): Chance that an input is a skip.
+        difficulty_time_scale (Dict[int, float]): Multiplies the answer time for each difficulty. Longer words take longer.
+    """
+
+    difficulty_time_scale: Dict[int, float] = {1: 1, 2: 1.4, 3: 2}
+
+    def __init__(self, name: str, answer_time_median: float, answer_time_spread: float, wrong_rate: float, skip_rate: float):
+        self.name = name
+        self.answer_time_median = answer_time_median
+        self.answer_time_spread = answer_time_spread
+        self.wrong_rate = wrong_rate
+        self.skip_rate = skip_rate
+
+    def get_inputs(self, difficulty: int, rng: random.Random) -> Iterator[Tuple[float, game.GameScrambled.PlayerAction]]:
+        """Generate the player's inputs for a round, one at a time.
+
+        Args:
+            difficulty (int): Difficulty of the round.
+            rng (random.Random): Random number generator to draw from.
+
+        Yields:
+            Tuple[float, PlayerAction]: Time taken for the input and what the player did.
+        """
+
+        median = self.answer_time_median*self.difficulty_time_scale.get(difficulty, 1)
+        while True:
+            delay = rng.lognormvariate(0, self.answer_time_spread)*median
+
+            roll = rng.random()
+            if roll < self.skip_rate:
+                yield delay, game.GameScrambled.PlayerAction.SKIP
+            elif roll < self.skip_rate + self.wrong_rate:
+                yield delay, game.GameScrambled.PlayerAction.WRONG
+            else:
+                yield delay, game.GameScrambled.PlayerAction.CORRECT
+
+
+# Built-in player models
+player_models: Dict[str, PlayerModel] = {
+    'fast': PlayerModel('fast', 2.5, 0.4, 0.05, 0.02),
+    'average': PlayerModel('average', 5, 0.5, 0.15, 0.05),
+    'struggling': PlayerModel('struggling', 9, 0.6, 0.3, 0.15),
+}
+
+# Report order of the round outcomes, None is a round that did not end within max_inputs
+outcomes = [game.GameScrambled.WinType.BIG_WIN, game.GameScrambled.WinType.WIN, game.GameScrambled.WinType.LOSE, None]
+
+
+def check_overrides(overrides: Dict[str, any]) -> None:
+    """Check that settings to override are all GameScrambled members.
+
+    Args:
+        overrides (Dict[str, any]): Member name to value.
+
+    Raises:
+        ValueError: If a name is not a GameScrambled member.
+    """
+
+    unknown = [name for name in overrides if not hasattr(game.GameScrambled, name)]
+    if unknown:
+        raise ValueError(f'Not GameScrambled members: {", ".join(unknown)}')
+
+
+def apply_overrides(game_instance: game.GameScrambled, overrides: Dict[str, any]) -> None:
+    """Override GameScrambled members on a game. See check_overrides.
+    """
+
+    check_overrides(overrides)
+    for name, value in overrides.items():
+        setattr(game_instance, name, value)
+
+
+def run_batch(batch: tuple) -> Tuple[str, int, Dict[Optional[game.GameScrambled.WinType], int]]:
+    """Play a batch of rounds for one player model and difficulty. Runs in a worker process.
+
+    Args:
+        batch (tuple): (player model, difficulty, rounds, seed, overrides, cat_initial, max_inputs),
+                       overrides being the GameScrambled members to override.
+
+    Returns:
+        Tuple[str, int, Dict[Optional[WinType], int]]: Player model name, difficulty and number of rounds per outcome.
+    """
+
+    model, difficulty, rounds, seed, overrides, cat_initial, max_inputs = batch
+
+    rng = random.Random(seed)
+    random.seed(seed) # Word sampling uses the global generator
+
+    game_instance = game.GameScrambled(clock=game.ManualClock(), event_sink=None)
+    apply_overrides(game_instance, overrides)
+
+    counts = dict.fromkeys(outcomes, 0)
+    for _ in range(rounds):
+        inputs = islice(model.get_inputs(difficulty, rng), max_inputs)
+        counts[game_instance.simulate_round(difficulty, cat_initial, inputs)] += 1
+
+    return model.name, difficulty, counts
+
+
+def parse_pairs(text: str, separator: str) -> List[Tuple[float, float]]:
+    """Parse a comma separated list of number pairs, e.g. '2:5,5:4'.
+
+    Args:
+        text (str): Text to parse.
+        separator (str): Separator between the two numbers of a pair.
+
+    Returns:
+        List[Tuple[float, float]]: Parsed pairs.
+    """
+
+    pairs = []
+    for item in text.split(','):
+        left, right = item.split(separator)
+        pairs.append((float(left), float(right)))
+    return pairs
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    defaults = game.GameScrambled
+
+    parser = argparse.ArgumentParser(description='Simulate batches of rounds to balance the difficulty and scoring settings.')
+    parser.add_argument('--rounds', type=int, default=100000, help='rounds per player model and difficulty')
+    parser.add_argument('--difficulties', default='1,2,3', help='comma separated difficulties to simulate')
+    parser.add_argument('--models', default=','.join(player_models), help='comma separated built-in player models')
+    parser.add_argument('--model', action='append', default=[], metavar='NAME:MEDIAN:SPREAD:WRONG:SKIP', help='add a custom player model')
+    parser.add_argument('--difficulty-map', default=','.join(f'{k}={v}' for k, v in defaults.difficulty_map.items()), help='cat speed per difficulty, e.g. 1=1,2=0.74,3=0.5')
+    parser.add_argument('--bands', default=','.join(f'{t}:{p}' for t, p in defaults.answer_point_bands), help='answer time bands, e.g. 2:5,5:4,9:3,15:2')
+    parser.add_argument('--min-points', type=int, default=defaults.answer_min_points, help='points for an answer slower than every band')
+    parser.add_argument('--fast-win-points', type=int, default=defaults.fast_win_points, help='point lead over the cat for a big win')
+    parser.add_argument('--cat-initial', type=int, default=-10, help='points the cat starts the round with')
+    parser.add_argument('--max-inputs', type=int, default=1000, help='give up on a round after this many inputs')
+    parser.add_argument('--batch-size', type=int, default=10000, help='rounds per worker task')
+    parser.add_argument('--workers', type=int, default=cpu_count(), help='worker processes')
+    parser.add_argument('--seed', type=int, default=0, help='base random seed')
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> None:
+    args = parse_args(argv)
+
+    # Player models to simulate
+    models = [player_models[name] for name in args.models.split(',') if name]
+    for custom in args.model:
+        name, *values = custom.split(':')
+        models.append(PlayerModel(name, *map(float, values)))
+
+    # GameScrambled members to override in every worker. Checked here, so a typo fails before any worker starts.
+    overrides = {
+        'difficulty_map': {int(k): v for k, v in parse_pairs(args.difficulty_map, '=')},
+        'answer_point_bands': [(t, int(p)) for t, p in parse_pairs(args.bands, ':')],
+        'answer_min_points': args.min_points,
+        'fast_win_points': args.fast_win_points,
+    }
+    check_overrides(overrides)
+    difficulties = [int(d) for d in args.difficulties.split(',')]
+
+    # Split every (model, difficulty) pair into batches with their own seed
+    batches = []
+    for model in models:
+        for difficulty in difficulties:
+            remaining = args.rounds
+            while remaining > 0:
+                rounds = min(args.batch_size, remaining)
+                batches.append((model, difficulty, rounds, args.seed + len(batches), overrides, args.cat_initial, args.max_inputs))
+                remaining -= rounds
+
+    # Collate the results from all workers
+    totals = {(model.name, difficulty): dict.fromkeys(outcomes, 0) for model in models for difficulty in difficulties}
+    with Pool(args.workers) as pool:
+        for name, difficulty, counts in pool.imap_unordered(run_batch, batches):
+            for outcome, count in counts.items():
+                totals[(name, difficulty)][outcome] += count
+
+    # Report
+    print(f'{"model":<12}{"difficulty":>11}{"rounds":>10}{"big win":>10}{"win":>10}{"lose":>10}{"unfinished":>12}')
+    for (name, difficulty), counts in totals.items():
+        rounds = sum(counts.values())
+        rates = [f'{counts[outcome]/rounds:>10.1%}' for outcome in outcomes[:3]]
+        print(f'{name:<12}{difficulty:>11}{rounds:>10}{"".join(rates)}{counts[None]/rounds:>12.1%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+"""
+Asset build step. Packs each animation image sequence into one pre-scaled sprite sheet (PNG) plus a small
+JSON index of where every frame is, which gameclasses.load_image_sequence slices the frames from.
+
+Pure Python (zlib) so it runs without a display or any image library.
+
+Usage:
+    python build_atlas.py                                                 (builds the cat and mouse sheets of the game)
+    python build_atlas.py assets/Cat_atlas.json -s 2 assets/Cat_frame0*.png
+"""
+
+# Command line interface
+import argparse
+
+# PNG reading and writing
+import json
+import math
+import os
+import struct
+import zlib
+
+# Better type hinting
+from typing import *
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+CHANNELS = {0: 1, 2: 3, 4: 2, 6: 4} # Channels per PNG colour type (grey, RGB, grey alpha, RGBA)
+
+
+class Bitmap():
+    """Decoded RGBA image.
+
+    Members:
+        width (int): Width in pixels.
+        height (int): Height in pixels.
+        rows (List[bytes]): RGBA pixel data, one bytes object per row.
+    """
+
+    def __init__(self, width: int, height: int, rows: List[bytes] = None):
+        self.width, self.height = width, height
+        self.rows = rows if rows is not None else [bytes(width*4)]*height
+
+    def subsample(self, factor: int) -> 'Bitmap':
+        """Shrink the image by picking every Xth and Yth pixel, same as tk.PhotoImage.subsample.
+
+        Args:
+            factor (int): Subsample factor.
+
+        Returns:
+            Bitmap: Shrunk image.
+        """
+
+        rows = []
+        for row in self.rows[::factor]:
+            pixels = [row[x:x + 4] for x in range(0, len(row), 4*factor)]
+            rows.append(b''.join(pixels))
+        return Bitmap(len(rows[0])//4, len(rows), rows)
+
+
+def paeth(a: int, b: int, c: int) -> int:
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    if pb <= pc:
+        return b
+    return c
+
+
+def read_png(path: str) -> Bitmap:
+    """Decode an 8-bit, non-interlaced PNG into RGBA.
+
+    Args:
+        path (str): File path of the PNG.
+
+    Raises:
+        ValueError: If the file is not a PNG this decoder supports.
+
+    Returns:
+        Bitmap: Decoded image.
+    """
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError(f'Not a PNG file: {path}')
+
+    # Collect the header and the compressed image data
+    position, compressed = len(PNG_SIGNATURE), []
+    while position < len(data):
+        length, chunk_type = struct.unpack('>I4s', data[position:position + 8])
+        chunk = data[position + 8:position + 8 + length]
+        if chunk_type == b'IHDR':
+            width, height, bit_depth, colour_type, _, _, interlace = struct.unpack('>IIBBBBB', chunk)
+        elif chunk_type == b'IDAT':
+            compressed.append(chunk)
+        position += length + 12
+
+    if bit_depth != 8 or colour_type not in CHANNELS or interlace:
+        raise ValueError(f'Only 8-bit non-interlaced grey/RGB(A) PNGs are supported: {path}')
+
+    channels = CHANNELS[colour_type]
+    stride = width*channels
+    raw = zlib.decompress(b''.join(compressed))
+
+    # Undo the per-row filters
+    rows, previous = [], bytearray(stride)
+    for y in range(height):
+        filter_type = raw[y*(stride + 1)]
+        row = bytearray(raw[y*(stride + 1) + 1:(y + 1)*(stride + 1)])
+
+        if filter_type == 1: # Sub
+            for i in range(channels, stride):
+                row[i] = (row[i] + row[i - channels]) & 0xff
+        elif filter_type == 2: # Up
+            row = bytearray((a + b) & 0xff for a, b in zip(row, previous))
+        elif filter_type == 3: # Average
+            for i in range(stride):
+                left = row[i - channels] if i >= channels else 0
+                row[i] = (row[i] + ((left + previous[i]) >> 1)) & 0xff
+        elif filter_type == 4: # Paeth
+            for i in range(stride):
+                if i >= channels:
+                    row[i] = (row[i] + paeth(row[i - channels], previous[i], previous[i - channels])) & 0xff
+                else:
+                    row[i] = (row[i] + previous[i]) & 0xff
+
+        rows.append(row)
+        previous = row
+
+    # Convert to RGBA
+    if channels != 4:
+        converted = []
+        for row in rows:
+            pixels = [row[x:x + channels] for x in range(0, stride, channels)]
+            if channels == 1:
+                converted.append(b''.join(bytes((p[0], p[0], p[0], 255)) for p in pixels))
+            elif channels == 2:
+                converted.append(b''.join(bytes((p[0], p[0], p[0], p[1])) for p in pixels))
+            else:
+                converted.append(b''.join(bytes(p) + b'\xff' for p in pixels))
+        rows = converted
+
+    return Bitmap(width, height, [bytes(row) for row in rows])
+
+
+def write_png(path: str, bitmap: Bitmap) -> None:
+    """Encode an RGBA image as PNG. Each row uses whichever of the None, Sub and Up filters looks smallest.
+
+    Args:
+        path (str): File path to write to.
+        bitmap (Bitmap): Image to encode.
+    """
+
+    def chunk(chunk_type: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+    raw, previous = bytearray(), bytes(bitmap.width*4)
+    for row in bitmap.rows:
+        candidates = [
+            (0, row),
+            (1, bytes((row[i] - (row[i - 4] if i >= 4 else 0)) & 0xff for i in range(len(row)))),
+            (2, bytes((a - b) & 0xff for a, b in zip(row, previous))),
+        ]
+        # Rows of small signed differences compress best
+        filter_type, filtered = min(candidates, key=lambda c: sum(b if b < 128 else 256 - b for b in c[1]))
+        raw.append(filter_type)
+        raw += filtered
+        previous = row
+
+    with open(path, 'wb') as f:
+        f.write(PNG_SIGNATURE)
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', bitmap.width, bitmap.height, 8, 6, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(bytes(raw), 9)))
+        f.write(chunk(b'IEND', b''))
+
+
+def build_atlas(index_file: str, image_files: List[str], subsample: int = None, columns: int = None) -> dict:
+    """Pack an image sequence into one sprite sheet next to its JSON index.
+
+    Args:
+        index_file (str): File path of the JSON index to write. The sheet is written next to it as a PNG with the same name.
+        image_files (List[str]): Frames of the sequence, in order.
+        subsample (int, optional): Shrink the frames by picking every Xth and Yth pixel. Defaults to None.
+        columns (int, optional): Frames per row of the sheet. Defaults to a roughly square sheet.
+
+    Returns:
+        dict: The index that was written.
+    """
+
+    frames = [read_png(path) for path in image_files]
+    if subsample:
+        frames = [frame.subsample(subsample) for frame in frames]
+
+    # Lay the frames out on a grid of equally sized cells
+    columns = columns or math.ceil(math.sqrt(len(frames)))
+    cell_width = max(frame.width for frame in frames)
+    cell_height = max(frame.height for frame in frames)
+    sheet_rows = math.ceil(len(frames)/columns)
+
+    sheet = Bitmap(cell_width*columns, cell_height*sheet_rows)
+    sheet.rows = [bytearray(row) for row in sheet.rows]
+
+    index = {'image': os.path.splitext(os.path.basename(index_file))[0] + '.png', 'subsample': subsample, 'frames': []}
+    for i, frame in enumerate(frames):
+        x, y = (i % columns)*cell_width, (i//columns)*cell_height
+        for row_index, row in enumerate(frame.rows):
+            sheet.rows[y + row_index][x*4:(x + frame.width)*4] = row
+
+        index['frames'].append({'x': x, 'y': y, 'width': frame.width, 'height': frame.height,
+                                'source': os.path.basename(image_files[i])})
+
+    write_png(os.path.join(os.path.dirname(index_file), index['image']), sheet)
+    with open(index_file, 'w') as f:
+        json.dump(index, f, indent=4)
+
+    return index
+
+
+def get_game_atlases() -> List[Tuple[str, List[str], int]]:
+    """Gets the sprite sheets used by the game screen.
+
+    Returns:
+        List[Tuple[str, List[str], int]]: (index file, image sequence, subsample) of each sheet.
+    """
+
+    import main # Only needed for the default build, main pulls in tkinter
+    return [
+        (main.GameFrame.cat_atlas, main.GameFrame.cat_sequence, main.GameFrame.cat_subsample),
+        (main.GameFrame.mouse_atlas, main.GameFrame.mouse_sequence, main.GameFrame.mouse_subsample),
+    ]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pack animation frames into pre-scaled sprite sheets.')
+    parser.add_argument('index_file', nargs='?', help='JSON index to write, the sheet PNG is written next to it (default: build every sheet of the game)')
+    parser.add_argument('image_files', nargs='*', help='frames of the sequence, in order')
+    parser.add_argument('-s', '--subsample', type=int, default=None, help='shrink the frames by picking every Nth pixel')
+    parser.add_argument('-c', '--columns', type=int, default=None, help='frames per row of the sheet')
+    args = parser.parse_args()
+
+    jobs = [(args.index_file, args.image_files, args.subsample)] if args.index_file else get_game_atlases()
+
+    for index_file, image_files, subsample in jobs:
+        build_atlas(index_file, image_files, subsample, args.columns)
+
+        sources = sum(os.path.getsize(path) for path in image_files)
+        sheet = os.path.getsize(os.path.join(os.path.dirname(index_file), os.path.splitext(os.path.basename(index_file))[0] + '.png'))
+        print(f'{index_file}: {len(image_files)} frames, {sources//1024} KB -> {sheet//1024} KB')
@@ -0,0 +1,204 @@
+"""
+Vectorized scoring for many rounds at once. Gives the same points and round outcomes as playing the rounds
+through GameScrambled.simulate_round, for offline analysis of recorded sessions and for balancing.
+
+Needs NumPy (only this module does, the game itself does not).
+
+Usage:
+    python bulk_scoring.py --verify 10000
+"""
+
+# Command line interface
+import argparse
+
+# Vectorized maths
+import numpy as np
+
+# Better type hinting
+from typing import *
+
+# Core game logic
+import game_scrambled as game
+
+
+# Codes used in the actions and outcome arrays
+NO_INPUT: int = -1 # Padding after the last input of a round
+UNFINISHED: int = -1 # Round did not end within its inputs
+
+
+class BulkRoundResults(NamedTuple):
+    """Results of evaluate_rounds. Per input arrays are (rounds, inputs), inputs after the end of a round are zeroed.
+
+    Members:
+        points (np.ndarray): Points rewarded for every input.
+        mouse_points (np.ndarray): Mouse points after every input.
+        cat_points (np.ndarray): Cat points at the time of every input.
+        cat_dist (np.ndarray): Distance between mouse and cat after every input.
+        outcome (np.ndarray): WinType value of every round, UNFINISHED if the inputs ran out first.
+        end_index (np.ndarray): Index of the input that ended every round, UNFINISHED if the inputs ran out first.
+    """
+
+    points: np.ndarray
+    mouse_points: np.ndarray
+    cat_points: np.ndarray
+    cat_dist: np.ndarray
+    outcome: np.ndarray
+    end_index: np.ndarray
+
+
+def get_answer_point_levels(question_times: np.ndarray, settings: game.GameScrambled = game.GameScrambled) -> np.ndarray:
+    """Vectorized GameScrambled.get_answer_point_level.
+
+    Args:
+        question_times (np.ndarray): Time taken on each question.
+        settings (GameScrambled, optional): Game (or game class) to read answer_point_bands from. Defaults to GameScrambled.
+
+    Returns:
+        np.ndarray: Points rewarded for each answer time.
+    """
+
+    # Apply the bands last to first, so the first matching band wins like in the if/elif ladder
+    points = np.full(np.shape(question_times), settings.answer_min_points, dtype=np.int64)
+    for time_limit, band_points in reversed(settings.answer_point_bands):
+        points = np.where(question_times < time_limit, band_points, points)
+
+    return points
+
+
+def evaluate_rounds(delays: np.ndarray, actions: np.ndarray, difficulties: np.ndarray, cat_initial: float,
+                    settings: game.GameScrambled = game.GameScrambled) -> BulkRoundResults:
+    """Score many rounds at once.
+
+    Args:
+        delays (np.ndarray): (rounds, inputs) time taken for every input.
+        actions (np.ndarray): (rounds, inputs) PlayerAction value of every input, NO_INPUT after the last input of a round.
+        difficulties (np.ndarray): (rounds,) difficulty of every round.
+        cat_initial (float): Initial points for the cat.
+        settings (GameScrambled, optional): Game (or game class) to read the scoring settings from. Defaults to GameScrambled.
+
+    Returns:
+        BulkRoundResults: Points, distances and outcome of every round.
+    """
+
+    actions = np.asarray(actions)
+    has_input = actions != NO_INPUT
+    delays = np.where(has_input, delays, 0.0)
+
+    correct = actions == game.GameScrambled.PlayerAction.CORRECT.value
+    wrong = actions == game.GameScrambled.PlayerAction.WRONG.value
+    skip = actions == game.GameScrambled.PlayerAction.SKIP.value
+    advances = correct | skip # Inputs that move on to the next question
+
+    # Game time of every input
+    game_time = np.cumsum(delays, axis=1)
+
+    # Time the current question was asked: the game time of the previous advancing input, or the start of the round
+    advance_time = np.where(advances, game_time, 0.0)
+    question_start = np.zeros_like(game_time)
+    question_start[:, 1:] = np.maximum.accumulate(advance_time, axis=1)[:, :-1]
+    question_time = game_time - question_start
+
+    # Points of every input
+    points = np.select([correct, wrong, skip], [get_answer_point_levels(question_time, settings), -1, -3], 0)
+    mouse_points = np.cumsum(points, axis=1)
+    mouse_before = mouse_points - points
+
+    # Cat speed of every round
+    speed_lookup = np.zeros(max(settings.difficulty_map) + 1)
+    for difficulty, speed in settings.difficulty_map.items():
+        speed_lookup[difficulty] = speed
+    cat_speed = speed_lookup[np.asarray(difficulties)][:, None]
+
+    cat_points = game_time*cat_speed + cat_initial
+    dist_before = mouse_before - cat_points
+    cat_dist = mouse_points - cat_points
+
+    # Last question answered or skipped
+    questions_asked = np.cumsum(advances, axis=1)
+    last_question = advances & (questions_asked >= settings.total_questions)
+
+    # Cat caught up, or got left in the dust, while the player was still thinking
+    caught_thinking = (dist_before < 0) | (dist_before >= settings.fast_win_points)
+
+    # How every input would end the round, in the order the game checks it
+    lose = game.GameScrambled.WinType.LOSE.value
+    win = game.GameScrambled.WinType.WIN.value
+    big_win = game.GameScrambled.WinType.BIG_WIN.value
+    ending = np.select(
+        [dist_before < 0, dist_before >= settings.fast_win_points, # Cat position while thinking
+         last_question, # All questions asked, checked before the last points count
+         cat_dist < 0, cat_dist >= settings.fast_win_points], # Cat position after the answer
+        [lose, big_win,
+         np.where(dist_before > 0, win, lose),
+         lose, big_win],
+        UNFINISHED)
+    ending = np.where(has_input, ending, UNFINISHED)
+
+    # The first ending input ends the round
+    ended = ending != UNFINISHED
+    end_index = np.where(ended.any(axis=1), ended.argmax(axis=1), UNFINISHED)
+    rounds = np.arange(len(end_index))
+    outcome = np.where(end_index != UNFINISHED, ending[rounds, end_index], UNFINISHED)
+
+    # Zero everything after the end of each round. The input that ended the round
+    # still counts, unless the cat got there before the player could answer.
+    columns = np.arange(actions.shape[1])[None, :]
+    unfinished = end_index[:, None] == UNFINISHED
+    reached = has_input & (unfinished | (columns <= end_index[:, None]))
+    answered = reached & (unfinished | (columns < end_index[:, None]) | ~caught_thinking)
+
+    points = np.where(answered, points, 0)
+    mouse_points = np.where(reached, np.cumsum(points, axis=1), 0)
+    cat_points = np.where(reached, cat_points, 0.0)
+    cat_dist = np.where(reached, mouse_points - cat_points, 0.0)
+
+    return BulkRoundResults(points, mouse_points, cat_points, cat_dist, outcome, end_index)
+
+
+def verify(rounds: int, seed: int = 0) -> int:
+    """Check evaluate_rounds against GameScrambled.simulate_round on random rounds.
+
+    Args:
+        rounds (int): Number of random rounds to check.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        int: Number of rounds where the results differ.
+    """
+
+    rng = np.random.default_rng(seed)
+    max_inputs = 40
+
+    # Random inputs, with padding of random length and a mix of fast and slow answers
+    delays = rng.exponential(rng.choice([1, 4, 10], size=(rounds, 1)), size=(rounds, max_inputs))
+    actions = rng.choice(3, size=(rounds, max_inputs), p=[0.7, 0.2, 0.1])
+    lengths = rng.integers(1, max_inputs + 1, size=rounds)
+    actions[np.arange(max_inputs)[None, :] >= lengths[:, None]] = NO_INPUT
+    difficulties = rng.integers(1, 4, size=rounds)
+    cat_initial = -10
+
+    results = evaluate_rounds(delays, actions, difficulties, cat_initial)
+
+    mismatches = 0
+    for i in range(rounds):
+        game_instance = game.GameScrambled(clock=game.ManualClock(), event_sink=None)
+        inputs = [(delays[i, j], game.GameScrambled.PlayerAction(actions[i, j])) for j in range(lengths[i])]
+        win_type = game_instance.simulate_round(int(difficulties[i]), cat_initial, inputs)
+
+        expected_outcome = win_type.value if win_type else UNFINISHED
+        end = results.end_index[i] if results.end_index[i] != UNFINISHED else lengths[i] - 1
+        if expected_outcome != results.outcome[i] or game_instance.get_mouse_points() != results.mouse_points[i, end]:
+            mismatches += 1
+
+    return mismatches
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Vectorized round scoring.')
+    parser.add_argument('--verify', type=int, default=1000, metavar='ROUNDS', help='check against the scalar game logic on random rounds')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+
+    mismatches = verify(args.verify, args.seed)
+    print(f'{args.verify - mismatches}/{args.verify} rounds match the scalar game logic')
+    raise SystemExit(1 if mismatches else 0)
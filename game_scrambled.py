@@ -1,17 +1,65 @@
 # Timing game events
 from timeit import default_timer as current_time
 
-# RNG
-import random
-
 # Constant preset values
 from enum import Enum
 
 # Better type hinting
 from typing import *
+from functools import partial
 
-# Game word list
+# Game word bank
 from wordlist import *
+from wordbank import WordGroup, sample_indices
+
+# Word scrambling
+from scrambler import WordScrambler
+
+# Word rotation across rounds
+from rotation import WordRotation
+
+
+class ManualClock():
+    """Clock that only moves when told to. Lets a round be simulated headless, without waiting in real time.
+
+    Members:
+        time (float): Current time of the clock in seconds.
+    """
+
+    def __init__(self, time: float = 0.0):
+        self.time = time
+
+    def __call__(self) -> float:
+        return self.time
+
+    def advance(self, seconds: float) -> None:
+        """Move the clock forward.
+
+        Args:
+            seconds (float): Amount of time to move forward by.
+        """
+        self.time += seconds
+
+
+class GameState(NamedTuple):
+    """Snapshot of a round at one moment. Every value is worked out from the same clock reading,
+    so everything reading the snapshot in a frame agrees.
+
+    Members:
+        game_time (float): Time elapsed for the game.
+        question_time (float): Time elapsed on the current question.
+        mouse_points (int): Mouse (player) points.
+        cat_points (float): Cat points.
+        cat_dist (float): Difference between the mouse points and cat points.
+        now (float): Clock reading the snapshot was worked out from.
+    """
+
+    game_time: float
+    question_time: float
+    mouse_points: int
+    cat_points: float
+    cat_dist: float
+    now: float
 
 
 class GameScrambled():
@@ -19,15 +67,29 @@ class GameScrambled():
 
     Members:
         difficulty_map (Dict[int, int]): Maps the speed of the cat to the difficulty setting.
-        original_list (List[str]): Original word list
-        shuffled_list (List[str]): Shuffled word list with shuffled words.
+        theme (str): Word bank theme the words are drawn from.
+        original_list (Sequence[str]): Original word list. Read-only, the words of each round are drawn from it.
+        question_words (List[str]): Original words of the questions prepared so far, in question order.
+        shuffled_list (List[str]): Scrambled words of the questions prepared so far, in the same order as question_words.
+        question_lookahead (int): Number of questions scrambled ahead of the current one by prepare_questions.
+        scrambler (WordScrambler): Scrambles the words. Shared by all games, its pool is prepared with the words of the theme on load, avoiding scrambles that spell other words of the theme.
+        scrambler_prepare_limit (int): Maximum number of words pre-scrambled on load, so large word banks still start fast.
+        rotation (WordRotation): Picks the words of each round avoiding recently served ones. None to pick them at random.
+        player (str): Name of the player of this round, words are rotated per player when given. None if unknown.
         question_index (int): Current position on the list of words that the player has progressed.
 
         cat_initial (int): Amount of points the cat starts the game with.
         game_time_start (float): The system time at the moment the game starts.
         fast_win_points (int): The point difference between the player and the cat for an early win.
+        answer_point_bands (List[Tuple[float, int]]): Time limits and the points rewarded for a correct answer under them, checked in order.
+        answer_min_points (int): Points rewarded for a correct answer slower than every band.
         on_question_callback (Callable[[str], None]): Callback function that gets invoked when a new question is asked. Passes the new scrambled word as argument.
         on_win_callback (Callable[[WinType], None]): Callback function that gets invoked when a winning condition is triggered (e.g. early win, normal win, loss). Passes the WinType of the round as argument.
+        clock (Callable[[], float]): Returns the current time in seconds. Pass a ManualClock to simulate rounds headless.
+        event_sink (Callable[..., None]): Receives the game event messages, called like print. None to discard them.
+        state (GameState): Snapshot taken by the last take_snapshot. Once the round ends, the snapshot it ended on.
+        round_state (RoundState): Stage of the current round.
+        win_type (WinType): How the current round ended. None until it ends.
     """
 
     class WinType(Enum):
@@ -38,21 +100,70 @@ class GameScrambled():
         WIN = 1
         BIG_WIN = 2
 
+    class RoundState(Enum):
+        """Stages of a round. End conditions are only checked while RUNNING, so a round ends exactly once.
+        """
+
+        NOT_STARTED = 0
+        RUNNING = 1 # Questions are being asked
+        ENDING = 2 # An end condition was met, the ending is playing
+        FINISHED = 3 # Ending is done
+
+    class PlayerAction(Enum):
+        """Player inputs for a simulated round.
+        """
+
+        CORRECT = 0
+        WRONG = 1
+        SKIP = 2
+
     # Member list
     difficulty_map: Dict[int, int] = {1: 1, 2: 0.74, 3: 0.5} # Maps the cat running speed to the difficulty
-    original_list: List[str] = [] # Original word list
+    theme: str = 'animals' # Word bank theme the words are drawn from
+    original_list: Sequence[str] = [] # Original word list
+    question_words: List[str] = []
     shuffled_list: List[str] = []
+    question_lookahead: int = 1 # Questions scrambled ahead of the current one when the game is idle
+    question_generator: Iterator[Tuple[str, str]] = None
+    scrambler: WordScrambler = WordScrambler() # Shared by every game, so each word is only pre-scrambled once
+    scrambler_prepare_limit: int = 1000 # Words of the theme pre-scrambled on load, the rest are scrambled when asked
+    rotation: WordRotation = None # Set to avoid repeating words across rounds
+    player: str = None
     total_questions: int = 10 # Total number of questions per round
     question_index: int = 0
 
     cat_initial: int = 0 # Amount of points the cat starts the game with.
     game_time_start: float = 0.0 # The system time at the moment the game starts.
     fast_win_points: int = 30 # The point difference between the player and the cat for an early win.
+    answer_point_bands: List[Tuple[float, int]] = [(2, 5), (5, 4), (9, 3), (15, 2)] # (Time limit in seconds, points), checked in order
+    answer_min_points: int = 1 # Points rewarded when the answer is slower than every band
     on_question_callback: Callable[[str], None] = None
     on_win_callback: Callable[[WinType], None] = None
+    state: GameState = None
+    round_state: RoundState = RoundState.NOT_STARTED
+    win_type: WinType = None
 
-    results = []
+    def __init__(self, clock: Callable[[], float] = current_time, event_sink: Callable[..., None] = print):
+        self.clock = clock
+        self.event_sink = event_sink
+        self.results = []
+
+        # Avoid scrambles that spell another word of the theme. Builds the theme's anagram index, once for every game.
+        if self.scrambler.is_word is None:
+            self.scrambler.is_word = partial(word_bank.is_word, theme=self.theme)
+
+        # Scramble every word up front, so starting a round does no shuffling work
+        self.scrambler.prepare(word_bank.group(self.theme)[:self.scrambler_prepare_limit])
+
+    def emit(self, *message) -> None:
+        """Send a game event message to the event sink.
+
+        Args:
+            message: Message parts, same as print.
+        """
 
+        if self.event_sink:
+            self.event_sink(*message)
 
     """
     -----------------------------------------------------------------------------------------------------------------------------------------------
@@ -60,57 +171,87 @@ class GameScrambled():
     -----------------------------------------------------------------------------------------------------------------------------------------------
     """
 
-    def get_current_word_list(self) -> List[str]:
+    def get_current_word_list(self) -> WordGroup:
         """Sets the word list for the current difficulty.
 
         Returns:
-            List[str]: Word list of the current difficulty.
+            WordGroup: Read-only view of the word bank words of the current theme and difficulty.
         """
 
-        if self.difficulty == 1:
-            return easyword
+        # Difficulty tiers are worked out when the word bank index is built, so this is a single lookup
+        words = word_bank.group(self.theme, self.difficulty)
+        if not words:
+            self.emit("Difficulty setting is invalid.", self.difficulty)
 
-        elif self.difficulty == 2:
-            return medword
+        return words
 
-        elif self.difficulty == 3:
-            return hardword
-
-        else:
-            print("Difficulty setting is invalid.", self.difficulty)
+    def shuffle_word(self, word: str) -> str:
+        """Shuffle letters in a word.
 
-    def shuffle_list(self) -> List[str]:
-        """Shuffles the words inside the current list.
+        Args:
+            word (str): Input word.
 
         Returns:
-            List[str]: Shuffled word list.
+            str: Shuffled word.
         """
 
-        return random.shuffle(self.original_list)
+        # Picked from the prepared scrambles, which never spell the original word
+        return self.scrambler.get_scramble(word)
 
-    def shuffle_word(self, word: str) -> str:
-        """Shuffle letters in a word.
+    def get_question_count(self) -> int:
+        """Gets the number of questions in this round.
 
-        Args:
-            word (str): Input word.
+        Returns:
+            int: Number of questions in this round.
+        """
+
+        return min(len(self.original_list), self.total_questions)
+
+    def get_rotation_key(self) -> tuple:
+        """Gets the key of the recently served words of this round: the theme and difficulty, and the player if known.
 
         Returns:
-            str: Shuffled word.
+            tuple: Rotation history key.
         """
 
-        letters = []
-        for char in word:
-            letters.append(char) # Creating a list of all the letters in the word
+        return (self.theme, self.difficulty) if self.player is None else (self.theme, self.difficulty, self.player)
 
-        random.shuffle(letters) # Shuffling the letters
+    def generate_questions(self) -> Iterator[Tuple[str, str]]:
+        """Draw the words of the round at random and scramble them, one question at a time, only when they are asked for.
+        The word list is never shuffled or copied, so a round costs the same however big the word bank is.
 
-        random_word = ''.join(letters)
+        Yields:
+            Tuple[str, str]: (original word, scrambled word) of the next question.
+        """
+
+        if self.rotation:
+            # Recently served words are avoided for this difficulty, and this player if known
+            words = self.rotation.draw(self.original_list, self.get_question_count(), self.get_rotation_key())
+        else:
+            words = (self.original_list[index] for index in sample_indices(len(self.original_list), self.get_question_count()))
 
-        while random_word == word: # Make sure the reshuffled words do not reshuffle to the original word
-            random.shuffle(letters)
-            random_word = ''.join(letters)
+        for word in words:
+            yield word, self.shuffle_word(word)
 
-        return random_word # Return the scrambled words
+    def prepare_questions(self, lookahead: int = None) -> None:
+        """Scramble the current question and the ones after it, if they have not been already.
+        Cheap to call when they are ready, so it can be called whenever the game is idle.
+
+        Args:
+            lookahead (int, optional): Number of questions to prepare after the current one. Defaults to question_lookahead.
+        """
+
+        if lookahead is None:
+            lookahead = self.question_lookahead
+
+        while len(self.shuffled_list) <= self.question_index + lookahead:
+            question = next(self.question_generator, None)
+            if question is None: # No more questions this round
+                break
+
+            original_word, scrambled_word = question
+            self.question_words.append(original_word)
+            self.shuffled_list.append(scrambled_word)
 
     def get_current_scrambled_word(self) -> str:
         """Gets the scrambled word for the current question.
@@ -127,7 +268,7 @@ class GameScrambled():
         Returns:
             str: Current original word.
         """
-        return self.original_list[self.question_index]
+        return self.question_words[self.question_index]
 
 
     """
@@ -171,7 +312,7 @@ class GameScrambled():
             float: Current time elapsed on the current question.
         """
 
-        return current_time() - self.qn_time_start
+        return self.clock() - self.qn_time_start
 
     def get_game_time(self) -> float:
         """Gets the time elapsed for the current game.
@@ -179,12 +320,12 @@ class GameScrambled():
         Returns:
             float: Time elapsed for the current game.
         """
-        return current_time() - self.game_time_start
+        return self.clock() - self.game_time_start
 
     def get_answer_point_level(self) -> int:
         """Gets the time-based points rewarded for the current question. Depends on when this function is called.
 
-        Rewards in priority:
+        Rewards in priority (see answer_point_bands):
             5 points if under 2s\n
             4 points if under 5s\n
             3 points if under 9s\n
@@ -199,53 +340,90 @@ class GameScrambled():
         c_time = self.get_question_time()
 
         # Point system
-        if c_time < 2:
-            return 5
-        elif c_time < 5:
-            return 4
-        elif c_time < 9:
-            return 3
-        elif c_time < 15:
-            return 2
-        else:
-            return 1
+        for time_limit, points in self.answer_point_bands:
+            if c_time < time_limit:
+                return points
 
-    def on_game_end_condition(self, win: bool, epic_win: bool = False):
+        return self.answer_min_points
+
+    def on_game_end_condition(self, win: bool, epic_win: bool = False, state: GameState = None):
         """Triggers the on_win_callback based on the winning condition.
 
         Args:
             win (bool): Whether it was a win.s
             epic_win (bool, optional): Whether it was an epic win. Defaults to False.
+            state (GameState, optional): Snapshot the end condition was found in. Defaults to taking a new snapshot.
         """
 
+        # Only the first end condition of a round counts
+        if self.round_state != self.RoundState.RUNNING: return
+        self.round_state = self.RoundState.ENDING
+
+        # The callback reads the round as it ended from state
+        self.state = state if state is not None else self.take_snapshot()
+        self.win_type = (self.WinType.BIG_WIN if epic_win else self.WinType.WIN) if win else self.WinType.LOSE
+
         if win:
             if epic_win:
-                print("DAYUM you left the cat in the dust!!!")
+                self.emit("DAYUM you left the cat in the dust!!!")
                 if self.on_win_callback:
                     self.on_win_callback(self.WinType.BIG_WIN)
             else:
-                print("Winner winner chicken dinner!")
+                self.emit("Winner winner chicken dinner!")
                 if self.on_win_callback:
                     self.on_win_callback(self.WinType.WIN)
         else:
-            print("Caught by cat!")
+            self.emit("Caught by cat!")
             if self.on_win_callback:
                 self.on_win_callback(self.WinType.LOSE)
-        print("Answer History")
+        self.emit("Answer History")
         for ans_tuple in self.results:
-            print(ans_tuple)
+            self.emit(ans_tuple)
+
+    def finish_round(self) -> None:
+        """Mark the ending of the round as done.
+        """
+
+        if self.round_state == self.RoundState.ENDING:
+            self.round_state = self.RoundState.FINISHED
 
-    def check_cat_position(self) -> None:
+    def take_snapshot(self, now: float = None) -> GameState:
+        """Reads the clock once and works out the state of the round from it. Meant to be called once per frame.
+
+        Args:
+            now (float, optional): Clock reading of this frame, if it was already read. Defaults to reading the clock.
+
+        Returns:
+            GameState: Snapshot of the round, also kept in state.
+        """
+
+        if now is None:
+            now = self.clock()
+        game_time = now - self.game_time_start
+        cat_points = game_time*self.difficulty_map[self.difficulty] + self.cat_initial
+
+        self.state = GameState(game_time, now - self.qn_time_start, self.mouse_point, cat_points, self.mouse_point - cat_points, now)
+        return self.state
+
+    def check_cat_position(self, state: GameState = None) -> None:
         """ Checks the cat position and whether the cat has caught up with the mouse, or if the mouse has left the cat in the dust. Triggers the game ending condition if it has.
+
+        Args:
+            state (GameState, optional): Snapshot of this frame. Defaults to taking a new snapshot.
         """
 
+        if self.round_state != self.RoundState.RUNNING: return # Round already over, nothing to check
+
+        if state is None:
+            state = self.take_snapshot()
+
         # Lose Condition
-        if self.get_cat_dist_from_mouse() < 0:
-            self.on_game_end_condition(False)
+        if state.cat_dist < 0:
+            self.on_game_end_condition(False, state=state)
 
         # Early win condition
-        if self.get_cat_dist_from_mouse() >= self.fast_win_points:
-            self.on_game_end_condition(True, True)
+        if state.cat_dist >= self.fast_win_points:
+            self.on_game_end_condition(True, True, state)
 
 
     """
@@ -262,20 +440,42 @@ class GameScrambled():
         self.question_index += 1
 
         # Checking if all the questions have been asked, if all have been asked get the win condition and end the game
-        if self.question_index >= len(self.shuffled_list) or self.question_index >= self.total_questions:
+        if self.question_index >= self.get_question_count():
 
             # Give the end game condition, if cat_dist_from_mouse <0, return False (Lose), else return True (Win but not BIG WIN)
-            self.on_game_end_condition(self.get_cat_dist_from_mouse() > 0)
+            state = self.take_snapshot()
+            self.on_game_end_condition(state.cat_dist > 0, state=state)
             return
 
+        # Scramble this question now if it was not prepared ahead
+        self.prepare_questions(0)
+
+        # Only words that are actually asked count as served
+        if self.rotation:
+            self.rotation.mark_served(self.get_current_original_word(), self.get_rotation_key(), len(self.original_list))
+
         # Start the timer the moment the new question is given
-        self.qn_time_start = current_time()
-        print("Unscramble this:", self.get_current_scrambled_word())
+        self.qn_time_start = self.clock()
+        self.emit("Unscramble this:", self.get_current_scrambled_word())
 
         # Replace the variable on_question_callback with the current scrambled word
         if self.on_question_callback:
             self.on_question_callback(self.get_current_scrambled_word())
 
+    def is_correct_answer(self, answer: str, original_word: str) -> bool:
+        """Check whether an answer unscrambles a word. Any word of the current theme spelt with the same letters counts,
+        since the player can not tell which of them the scramble came from. Words of other themes do not.
+
+        Args:
+            answer (str): Player's answer.
+            original_word (str): Original word of the question.
+
+        Returns:
+            bool: Whether the answer is the original word or one of its anagrams in the theme.
+        """
+
+        return answer.lower() == original_word.lower() or answer.lower() in word_bank.get_anagrams(original_word, self.theme)
+
     def check_answer(self, answer: str, skip: bool = False) -> int:
         """Check the player's answer and award points respectively.
 
@@ -289,6 +489,8 @@ class GameScrambled():
             int: Amount of points obtained from the answer. Can be negative (in the case of a skip or wrong answer).
         """
 
+        if self.round_state != self.RoundState.RUNNING: return 0 # Round already over
+
         original_word = self.get_current_original_word() # Get the original (unscrambled) word
         question_points = 0 # Initialize the question points variable
 
@@ -297,16 +499,16 @@ class GameScrambled():
             # Skipped
 
             question_points = -3
-            print("Skipped. -3 points.")
+            self.emit("Skipped. -3 points.")
 
             self.next_question() # Start next question
 
         else:
-            if answer.lower() == original_word.lower():
+            if self.is_correct_answer(answer, original_word):
                 # Correct answer
 
                 question_points = self.get_answer_point_level() # Get the amt of points awared based on the time taken
-                print(f"You have earned {question_points} points! Time: {self.get_question_time()}s")
+                self.emit(f"You have earned {question_points} points! Time: {self.get_question_time()}s")
 
                 self.next_question() # Start next question
 
@@ -314,19 +516,20 @@ class GameScrambled():
                 # Wrong answer
 
                 question_points = -1
-                print("Wrong answer. -1 point.")
+                self.emit("Wrong answer. -1 point.")
 
         self.mouse_point += question_points # Collating the total amount of points
         self.results.append((answer,original_word))
 
         return question_points
 
-    def initiate_game(self, difficulty: int, cat_initial: int) -> None:
+    def initiate_game(self, difficulty: int, cat_initial: int, player: str = None) -> None:
         """Start the game round.
 
         Args:
             difficulty (int): Difficulty for this game round.
             cat_initial (int): Initial points for the cat.
+            player (str, optional): Name of the player, used to rotate words per player. Defaults to None.
         """
 
         # Initialize point values
@@ -334,23 +537,61 @@ class GameScrambled():
         self.cat_initial = cat_initial
 
         self.difficulty = difficulty # Difficulty chosen by user
+        self.player = player
         self.original_list = self.get_current_word_list()
-        print("Difficulty:", self.difficulty, self.original_list)
-
-        # Shuffle the order of words
-        self.shuffle_list()
+        self.emit("Difficulty:", self.difficulty, self.original_list)
 
-        # Creates the list of the scrambled letters for the words
-        self.shuffled_list = [self.shuffle_word(word) for word in self.original_list]
+        # Questions are drawn and scrambled one at a time as the round goes, starting with the first one in next_question
+        self.question_generator = self.generate_questions()
+        self.question_words = []
+        self.shuffled_list = []
         self.question_index = -1 # Offset the initial increment from self.next_question
         self.results = []
+        self.round_state = self.RoundState.RUNNING
+        self.win_type = None
 
         # Record game start time
-        self.game_time_start = current_time()
+        self.game_time_start = self.clock()
 
         # Begin the first question
         self.next_question()
 
+    def simulate_round(self, difficulty: int, cat_initial: int, player_inputs: Iterable[Tuple[float, PlayerAction]]) -> Optional[WinType]:
+        """Play a whole round headless. The clock must be a ManualClock, it is moved forward by the player's thinking time.
+        The cat position is checked right before and right after every answer, like the game loop would.
+
+        Args:
+            difficulty (int): Difficulty for this game round.
+            cat_initial (int): Initial points for the cat.
+            player_inputs (Iterable[Tuple[float, PlayerAction]]): Time taken for each input and what the player did. Consumed lazily.
+
+        Returns:
+            Optional[WinType]: How the round ended. None if the inputs ran out before the round ended.
+        """
+
+        self.initiate_game(difficulty, cat_initial)
+
+        for delay, action in player_inputs:
+            self.clock.advance(delay)
+
+            # The cat keeps running while the player is thinking
+            self.check_cat_position()
+            if self.round_state != self.RoundState.RUNNING: break
+
+            if action == self.PlayerAction.CORRECT:
+                self.check_answer(self.get_current_original_word())
+            elif action == self.PlayerAction.WRONG:
+                self.check_answer(self.get_current_original_word() + '?')
+            else:
+                self.check_answer('', skip=True)
+            if self.round_state != self.RoundState.RUNNING: break
+
+            self.check_cat_position()
+            if self.round_state != self.RoundState.RUNNING: break
+
+        self.finish_round() # No ending to play headless
+        return self.win_type
+
 if __name__ == "__main__":
     gamestart = GameScrambled()
     gamestart.initiate_game(2, -10)
\ No newline at end of file
@@ -1,6 +1,13 @@
 import tkinter as tk
+import json
+import math
+import os
+from collections import OrderedDict
+from timeit import default_timer as current_time
 from typing import *
 
+from profiling import FrameProfiler, startup_tracer
+
 class GameObject:
     """Base game object interface.
 
@@ -26,6 +33,120 @@ class GameObject:
         pass
 
 
+class ImageCache:
+    """Process-wide cache of decoded images, keyed by (file path, subsample).
+    Every sprite asking for the same key gets the same PhotoImage, so an image file is only decoded once.
+    The least recently used image is evicted when the cache grows past max_size.
+
+    Members:
+        max_size (int): Maximum number of decoded images kept in the cache.
+        images (OrderedDict[Tuple[str, int], tk.PhotoImage]): Cached images, ordered from least to most recently used.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups that had to decode the image file.
+    """
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self.images = OrderedDict()
+        self.hits, self.misses = 0, 0
+
+    def get(self, image_file: str, subsample: int = None) -> tk.PhotoImage:
+        """Get the decoded image for a file, decoding it on first use.
+
+        Args:
+            image_file (str): File path of the image asset.
+            subsample (int, optional): Shrink image by picking every Xth and Yth pixel of the image. Defaults to None.
+
+        Returns:
+            tk.PhotoImage: Decoded (and shrunk) image.
+        """
+
+        key = (image_file, subsample)
+        image = self.images.get(key)
+
+        if image is not None:
+            self.hits += 1
+            self.images.move_to_end(key) # Mark as most recently used
+            return image
+
+        self.misses += 1
+        with startup_tracer.asset(image_file):
+            image = tk.PhotoImage(file=image_file)
+        if subsample:
+            image = image.subsample(subsample, subsample) # Shrink the image
+
+        self.images[key] = image
+
+        # Evict the least recently used images. Sprites still showing them keep their own reference.
+        while len(self.images) > self.max_size:
+            self.images.popitem(last=False)
+
+        return image
+
+    def clear(self) -> None:
+        """Remove all images from the cache.
+        """
+        self.images.clear()
+
+# Shared by every sprite in the process
+image_cache = ImageCache()
+
+
+class SpriteAtlas:
+    """Sprite sheet holding every frame of an animation, pre-scaled. Built by build_atlas.py.
+
+    Members:
+        index_file (str): File path of the JSON index describing where each frame is on the sheet.
+        subsample (int): Subsample the frames were pre-scaled with.
+        frames (List[tk.PhotoImage]): Frames sliced from the sheet, in order.
+    """
+
+    def __init__(self, index_file: str):
+        self.index_file = index_file
+
+        with open(index_file) as f:
+            index = json.load(f)
+        self.subsample = index['subsample']
+
+        # One file to decode for the whole sequence, then slice every frame out of it
+        sheet_file = os.path.join(os.path.dirname(index_file), index['image'])
+        with startup_tracer.asset(sheet_file):
+            sheet = tk.PhotoImage(file=sheet_file)
+        self.frames = []
+        for frame in index['frames']:
+            x, y = frame['x'], frame['y']
+            image = tk.PhotoImage(width=frame['width'], height=frame['height'])
+            image.tk.call(image, 'copy', sheet, '-from', x, y, x + frame['width'], y + frame['height'], '-to', 0, 0)
+            self.frames.append(image)
+
+# Loaded sprite sheets by index file
+sprite_atlases: Dict[str, SpriteAtlas] = {}
+
+
+def load_image_sequence(image_sequence: List[str], subsample: int = None, atlas_file: str = None) -> List[tk.PhotoImage]:
+    """Load the frames of an animation. Uses the pre-scaled sprite sheet if it has been built with the same subsample,
+    otherwise decodes the separate image files.
+
+    Args:
+        image_sequence (List[str]): File paths of the frames.
+        subsample (int, optional): Shrink images by picking every Xth and Yth pixel of the image. Defaults to None.
+        atlas_file (str, optional): File path of the sprite sheet index. Defaults to None.
+
+    Returns:
+        List[tk.PhotoImage]: Decoded frames, in order.
+    """
+
+    if atlas_file and os.path.exists(atlas_file):
+        if atlas_file not in sprite_atlases:
+            sprite_atlases[atlas_file] = SpriteAtlas(atlas_file)
+
+        atlas = sprite_atlases[atlas_file]
+        if atlas.subsample == subsample and len(atlas.frames) == len(image_sequence):
+            return atlas.frames
+
+    return [image_cache.get(image_file, subsample) for image_file in image_sequence]
+
+
 class Sprite(GameObject):
     """Sprite class.
 
@@ -39,31 +160,51 @@ class Sprite(GameObject):
         self.subsample = subsample # Shrink image by picking every Xth and Yth pixel of the image
 
         self.canvas = canvas # Get canvas reference this sprite will be placed on
+        self.sprite = None # Canvas item id, created on the first update_sprite and reused afterwards
 
         if sprite_image:
             self.update_sprite(self.x, self.y, sprite_image)
 
-    def update_sprite(self, x: int, y: int, image_file: str):
+    def update_sprite(self, x: int, y: int, image_file: Union[str, tk.PhotoImage]):
         """Update sprite image.
 
         Args:
             x (int): x position of the sprite.
             y (int): y position of the sprite.
-            image_file (str): File path the image asset.
+            image_file (Union[str, tk.PhotoImage]): File path the image asset, or an already loaded image.
         """
 
-        self.sprite_image = tk.PhotoImage(file=image_file) # Set sprite image
-        if self.subsample:
-            self.sprite_image = self.sprite_image.subsample(self.subsample, self.subsample) # Shrink the image
+        if isinstance(image_file, tk.PhotoImage):
+            self.sprite_image = image_file # Already loaded (e.g. from a sprite sheet)
+        else:
+            self.sprite_image = image_cache.get(image_file, self.subsample) # Set sprite image (decoded once, then shared)
+
+        if self.sprite is None:
+            # Create the canvas item with the image in the x, y position with specified anchor point
+            self.sprite = self.canvas.create_image(x, y, image=self.sprite_image, anchor=self.anchor)
+        else:
+            # Reuse the existing canvas item instead of stacking a new one on top
+            self.canvas.itemconfigure(self.sprite, image=self.sprite_image)
+            self.canvas.coords(self.sprite, x, y)
+
+    def destroy(self) -> None:
+        """Delete the canvas item of this sprite. The next update_sprite creates a new one.
+        """
 
-        # Create animation sprite by canvas with the image in the x, y position with specified anchor point
-        self.sprite = self.canvas.create_image(x, y, image=self.sprite_image, anchor=self.anchor)
+        if self.sprite is not None:
+            self.canvas.delete(self.sprite)
+            self.sprite = None
 
 class AnimatedSprite(Sprite):
-    """Animated sprite class.
+    """Animated sprite class. The animation plays at its own rate, independent of the update loop rate.
 
     Inherits:
         Sprite
+
+    Members:
+        animation_fps (float): Animation frames shown per second.
+        animation_time (float): Time in seconds the animation has been playing for, advanced by each logic step.
+        image_swaps (int): Number of times the sprite image has actually been swapped on the canvas.
     """
 
     # List of cat frames for the animation
@@ -72,21 +213,101 @@ class AnimatedSprite(Sprite):
     # Store the index of the current frame in image_sequence, thus starting from the first frame
     current_seq_index: int = 0
 
-    def __init__(self, root, x, y, canvas, image_sequence=image_sequence, subsample = None, anchor=tk.CENTER):
+    def __init__(self, root, x, y, canvas, image_sequence=image_sequence, subsample = None, anchor=tk.CENTER, animation_fps: float = 12, scope=None):
         super().__init__(x, y, canvas, subsample=subsample, anchor=anchor)
         self.root = root
         self.image_sequence = image_sequence
-        self.root.update_event_handler.append(self.update)
+        self.animation_fps = animation_fps
+        self.animation_time = 0.0
+        self.image_swaps = 0
+
+        # What is currently shown on the canvas, so render only touches the canvas when something changed
+        self.rendered_seq_index = -1
+        self.rendered_position = None
+
+        # Only animate while the screen owning the canvas is shown
+        if scope is None and isinstance(canvas.master, GameFrame):
+            scope = canvas.master
+
+        self.update_subscription = self.root.subscribe(self.update, scope=scope)
+        self.render_subscription = self.root.subscribe(self.render, scope=scope, render=True)
 
     def update(self):
         if not self.enabled: return
 
-        # Rollover animation index if reached the end
-        self.current_seq_index += 1
-        if self.current_seq_index == len(self.image_sequence): self.current_seq_index = 0
+        # Advance by the fixed logic step, so the animation speed does not depend on how fast the machine is
+        self.animation_time += self.root.frame_scheduler.step_time
 
-        # Update image
-        self.update_sprite(self.x, self.y, self.image_sequence[self.current_seq_index])
+        # Pick the frame for the elapsed time, rolling over at the end of the sequence
+        self.current_seq_index = int(self.animation_time*self.animation_fps) % len(self.image_sequence)
+
+    def render(self):
+        if not self.enabled: return
+
+        if self.current_seq_index != self.rendered_seq_index:
+            # Frame interval has passed, update image (and position)
+            self.update_sprite(self.x, self.y, self.image_sequence[self.current_seq_index])
+            self.rendered_seq_index = self.current_seq_index
+            self.image_swaps += 1
+
+        elif (self.x, self.y) != self.rendered_position:
+            # Same image, only moved
+            self.canvas.coords(self.sprite, self.x, self.y)
+
+        self.rendered_position = (self.x, self.y)
+
+    def destroy(self) -> None:
+        """Stop animating and delete the canvas item of this sprite.
+        """
+
+        self.update_subscription.unsubscribe()
+        self.render_subscription.unsubscribe()
+        super().destroy()
+
+
+class WidgetUpdateCounter:
+    """Counts widget updates sent to Tk, and the ones skipped because the value had not changed.
+
+    Members:
+        applied (int): Updates sent to Tk.
+        skipped (int): Updates skipped.
+    """
+
+    def __init__(self):
+        self.applied, self.skipped = 0, 0
+
+
+class TextBinding:
+    """Binds a value to a widget option (the text by default). Setting the value only goes through Tk
+    (and a possible re-layout) when it differs from what the widget already shows.
+
+    Members:
+        widget (tk.Widget): Bound widget.
+        option (str): Bound widget option.
+        value (any): Value the widget currently shows.
+        counter (WidgetUpdateCounter): Counts applied and skipped updates.
+    """
+
+    def __init__(self, widget: tk.Widget, counter: WidgetUpdateCounter, option: str = 'text'):
+        self.widget = widget
+        self.option = option
+        self.counter = counter
+        self.value = widget.cget(option)
+
+    def set(self, value: any) -> None:
+        """Show a value on the widget, if it is not already shown.
+
+        Args:
+            value (any): Value to show.
+        """
+
+        if value == self.value:
+            self.counter.skipped += 1
+            return
+
+        self.value = value
+        self.widget.configure(**{self.option: value})
+        self.counter.applied += 1
 
 
 class GameFrame(GameObject, tk.Frame):
@@ -98,6 +319,7 @@ class GameFrame(GameObject, tk.Frame):
 
     def __init__(self, parent, root):
         tk.Frame.__init__(self, parent)
+        self.root = root
 
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
@@ -105,6 +327,28 @@ class GameFrame(GameObject, tk.Frame):
         self.canvas = tk.Canvas(self, background='#dddddd') #create a canvas that will host all the sprites for the cat animation
         self.canvas.grid(row=0, column=0, columnspan=5, rowspan=5, sticky="nsew") # Make sure that the canvas covers everything
 
+    def bind_text(self, widget: tk.Widget, option: str = 'text') -> TextBinding:
+        """Bind a widget option so updates to it are only sent to Tk when the value changes.
+
+        Args:
+            widget (tk.Widget): Widget to bind.
+            option (str, optional): Widget option to bind. Defaults to 'text'.
+
+        Returns:
+            TextBinding: Binding to set the value through.
+        """
+
+        return TextBinding(widget, self.root.widget_updates, option)
+
+    def get_canvas_item_count(self) -> int:
+        """Gets the number of live items on this frame's canvas. Should stay flat while a screen is running.
+
+        Returns:
+            int: Number of items on the canvas.
+        """
+
+        return len(self.canvas.find_all())
+
 class DemoFrame(GameFrame): # For testing purposes only, to make sure the animation sprite works well
     def __init__(self, parent, root):
         super().__init__(parent, root)
@@ -125,6 +369,111 @@ class DemoFrame(GameFrame): # For testing purposes only, to make sure the animat
         #create mouse animation (substitute default image sequence with mouse image sequence)
         self.animated_mouse = AnimatedSprite(root, 200, 500, self.canvas, mouse_sequence)
 
+class FrameScheduler:
+    """Fixed timestep frame scheduler with drift compensation.
+
+    Deadlines are tracked on a monotonic clock, so the time spent running handlers is taken off the next delay
+    instead of being added to it. Every logic step advances the game by step_time. When a tick starts late,
+    the missed logic steps are run back to back and only one render step follows, up to max_frame_skip steps,
+    after which the deadline is resynced so a long stall does not turn into a burst of catch-up steps.
+
+    Members:
+        fps (int): Target frames per second.
+        step_time (float): Length of one logic step in seconds.
+        max_frame_skip (int): Maximum number of logic steps run for a single render step.
+        report_interval (float): Time window in seconds over which achieved_fps is measured.
+        logic_steps (int): Total number of logic steps run.
+        render_steps (int): Total number of render steps run.
+        skipped_renders (int): Render steps dropped so the logic could catch up.
+        dropped_steps (int): Logic steps given up on when the scheduler had to resync.
+        late_frames (int): Ticks that started after the following deadline had already passed.
+        achieved_fps (float): Render steps per second over the last report_interval.
+    """
+
+    def __init__(self, fps: int, max_frame_skip: int = 5, report_interval: float = 1.0, clock: Callable[[], float] = current_time):
+        self.fps = fps
+        self.step_time = 1/fps
+        self.max_frame_skip = max_frame_skip
+        self.report_interval = report_interval
+        self.clock = clock
+
+        self.logic_steps, self.render_steps = 0, 0
+        self.skipped_renders, self.dropped_steps, self.late_frames = 0, 0, 0
+        self.achieved_fps = 0.0
+
+        self.next_deadline = self.clock()
+        self.report_start = self.next_deadline
+        self.report_renders = 0
+
+    def begin_tick(self) -> int:
+        """Start a tick. Works out how many logic steps are due since the last tick.
+
+        Returns:
+            int: Number of logic steps to run in this tick. 0 if the tick woke up before its deadline.
+        """
+
+        now = self.clock()
+
+        steps = 0
+        while self.next_deadline <= now and steps < self.max_frame_skip:
+            steps += 1
+            self.next_deadline += self.step_time
+
+        if steps > 1:
+            self.late_frames += 1
+            self.skipped_renders += steps - 1
+
+        # Still behind after the maximum number of catch-up steps, drop the rest and resync
+        if self.next_deadline <= now:
+            self.dropped_steps += int((now - self.next_deadline)//self.step_time) + 1
+            self.next_deadline = now + self.step_time
+
+        self.logic_steps += steps
+        if steps:
+            self.render_steps += 1
+            self.report_renders += 1
+
+        # Measure achieved fps over the report window
+        if now - self.report_start >= self.report_interval:
+            self.achieved_fps = self.report_renders/(now - self.report_start)
+            self.report_start, self.report_renders = now, 0
+
+        return steps
+
+    def get_delay(self) -> int:
+        """Gets the delay until the next deadline, with the work done in this tick already taken off.
+
+        Returns:
+            int: Delay in ms, rounded up so the next tick never wakes up before its deadline.
+        """
+
+        return max(0, math.ceil((self.next_deadline - self.clock())*1000))
+
+
+class UpdateSubscription:
+    """Handle for a function subscribed to the GameRoot update loop. Returned by GameRoot.subscribe.
+
+    Members:
+        root (GameRoot): Root the function is subscribed to.
+        func (Callable[[], None]): Subscribed function.
+        scope (GameFrame): The function is only invoked while this frame is shown. None to invoke it on every screen.
+        render (bool): Whether the function is invoked once per tick as a render step, instead of once per logic step.
+        name (str): Name shown by the frame profiler.
+    """
+
+    def __init__(self, root, func: Callable[[], None], scope=None, render: bool = False):
+        self.root = root
+        self.func = func
+        self.scope = scope
+        self.render = render
+        self.name = getattr(func, '__qualname__', repr(func))
+
+    def unsubscribe(self) -> None:
+        """Stop invoking the subscribed function. Does nothing if it was already unsubscribed.
+        """
+        self.root.unsubscribe(self)
+
+
 class GameRoot(GameObject, tk.Tk):
     """Root game class. Calls update functions on all layouts it can.
 
@@ -139,25 +488,52 @@ class GameRoot(GameObject, tk.Tk):
         width (int): Window width.
         height (int): Window height.
         frame_delay (int): Delay between update frames in ms.
-        update_event_handler (List[Callable[[], None]]): All functions in this list are invoked every update frame.
+        frame_scheduler (FrameScheduler): Keeps the update loop on a fixed timestep.
+        frame_profiler (FrameProfiler): Times every tick and handler when enabled. F3 toggles its on-screen overlay.
+        widget_updates (WidgetUpdateCounter): Applied and skipped updates of every TextBinding of every screen.
+        frame_prefetch (Dict[type, List[type]]): Page classes to build in the background while a page class is shown.
+        frame_prefetch_delay (int): Delay in ms after a page is shown before prefetching starts.
+        update_event_handler (Dict[GameFrame, List[UpdateSubscription]]): Subscriptions invoked every logic step, by scope. Key None is invoked on every screen.
+        render_event_handler (Dict[GameFrame, List[UpdateSubscription]]): Subscriptions invoked once per tick after the logic steps, by scope.
     """
 
     # Frame list
     f_list: List[GameFrame] = []
     current_frame: tk.Frame = None
 
+    # Background frame building
+    frame_prefetch_delay: int = 100
+
+    # Frame profiler overlay
+    profiler_overlay: bool = False
+    profiler_overlay_owns_profiler: bool = False # Whether the overlay turned the profiler on, and turns it off again
+    profiler_overlay_interval: float = 0.5 # Seconds between overlay text updates
+    profiler_overlay_item: int = None
+    profiler_overlay_canvas: tk.Canvas = None
+    profiler_overlay_updated: float = 0.0
+
     # Window dimension
     width: int = 800
     height: int = 600
 
-    update_event_handler: List[Callable[[], None]] = []
+    # Subscriptions by scope, set up per instance so that two roots never share handlers
+    update_event_handler: Dict[GameFrame, List[UpdateSubscription]]
+    render_event_handler: Dict[GameFrame, List[UpdateSubscription]]
 
     def __init__(self, width, height, animation_fps, frames_list, *args, **kwargs):
         tk.Tk.__init__(self, *args, **kwargs)
 
+        self.update_event_handler = {}
+        self.render_event_handler = {}
+
         self.width, self.height = width, height #fix the window dimensions
         self.animation_fps = animation_fps
         self.f_list = frames_list
+        self.frame_scheduler = FrameScheduler(animation_fps)
+        self.frame_profiler = FrameProfiler()
+        self.widget_updates = WidgetUpdateCounter()
+        self.bind_all('<F3>', self.toggle_profiler_overlay)
+        self.frame_prefetch = {}
 
         # Window size
         self.geometry(f'{self.width}x{self.height}')
@@ -182,14 +558,14 @@ class GameRoot(GameObject, tk.Tk):
             page_class (tk.Tk): Page class.
         """
 
-        if page_class.__name__ in self.frames:
+        if page_class.__name__ in self.frame_classes:
             # Disable previous frame (if any)
             if self.current_frame and isinstance(self.current_frame, GameObject):
                 self.current_frame.enabled = False
                 self.current_frame.on_disable() #call back the disable frame function in the beginning
 
-            # Create the frame widgets for each game screen
-            widget = self.frames[page_class.__name__]
+            # Create the frame widgets for each game screen (only built the first time it is shown)
+            widget = self.get_frame(page_class)
 
             # Raise the frame and bring it to the most front (in the frame stack)
             widget.tkraise()
@@ -200,32 +576,199 @@ class GameRoot(GameObject, tk.Tk):
                 self.current_frame.enabled = True
                 self.current_frame.on_enable()
 
-    def load_frames(self) -> None:
-        """Put all of the pages in the same location and the one on the top of the stacking order will be visible
+            # Build the screens likely to come next once this one is up
+            if self.frame_prefetch.get(page_class):
+                self.after(self.frame_prefetch_delay, self.prefetch_frames, page_class)
+
+    def get_frame(self, page_class: tk.Tk) -> GameFrame:
+        """Gets the frame for the given page class, building it the first time.
+
+        Args:
+            page_class (tk.Tk): Page class.
+
+        Returns:
+            GameFrame: Frame of the page class.
         """
 
-        self.frames = {}
-        self.game_children = []
-        for widget_class in self.f_list:
-            page_name = widget_class.__name__
-            widget = widget_class(parent=self.container, root=self)
+        page_name = page_class.__name__
+        if page_name not in self.frames:
+            with startup_tracer.phase(f'build {page_name}', 'frame'):
+                widget = page_class(parent=self.container, root=self)
             self.frames[page_name] = widget #append to the frames dictionary
 
             # Add the frames to the GameObject index
             self.game_children.append(widget)
             widget.grid(row=0, column=0, sticky="nsew")
+            widget.lower() # New widgets stack on top, keep it behind the current frame until it is shown
+
+        return self.frames[page_name]
+
+    def prefetch_frames(self, page_class: tk.Tk) -> None:
+        """Build the next unbuilt frame in frame_prefetch for the given page class, one frame per call
+        so the shown screen stays responsive. Stops if the player has moved on to another screen.
+
+        Args:
+            page_class (tk.Tk): Page class the prefetch was started from.
+        """
+
+        if self.current_frame is not self.frames.get(page_class.__name__):
+            return
+
+        for next_class in self.frame_prefetch.get(page_class, []):
+            if next_class.__name__ not in self.frames:
+                self.get_frame(next_class)
+                self.after(self.frame_prefetch_delay, self.prefetch_frames, page_class)
+                return
+
+    def subscribe(self, func: Callable[[], None], scope: GameFrame = None, render: bool = False) -> UpdateSubscription:
+        """Subscribe a function to the update loop.
+
+        Args:
+            func (Callable[[], None]): Function to invoke.
+            scope (GameFrame, optional): Only invoke the function while this frame is shown. Defaults to None (every screen).
+            render (bool, optional): Invoke once per tick as a render step instead of once per logic step. Defaults to False.
+
+        Returns:
+            UpdateSubscription: Handle that can be used to unsubscribe.
+        """
+
+        subscription = UpdateSubscription(self, func, scope, render)
+        handlers = self.render_event_handler if render else self.update_event_handler
+        handlers.setdefault(scope, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: UpdateSubscription) -> None:
+        """Remove a subscription from the update loop. Does nothing if it is not subscribed.
+
+        Args:
+            subscription (UpdateSubscription): Handle returned by subscribe.
+        """
+
+        handlers = self.render_event_handler if subscription.render else self.update_event_handler
+        scoped = handlers.get(subscription.scope, [])
+        if subscription in scoped:
+            scoped.remove(subscription)
+            if not scoped:
+                del handlers[subscription.scope]
+
+    def get_active_handlers(self, handlers: Dict[GameFrame, List[UpdateSubscription]]) -> List[UpdateSubscription]:
+        """Gets the subscriptions that should run for the currently shown frame.
+
+        Args:
+            handlers (Dict[GameFrame, List[UpdateSubscription]]): update_event_handler or render_event_handler.
+
+        Returns:
+            List[UpdateSubscription]: Global subscriptions followed by the ones scoped to the current frame.
+        """
+
+        active = handlers.get(None, [])
+        if self.current_frame is not None: # Before any frame is shown, only the global subscriptions run
+            active = active + handlers.get(self.current_frame, [])
+        return active
+
+    def load_frames(self) -> None:
+        """Register all of the pages. They are put in the same location when built, and the one on the top of the stacking order will be visible.
+        Pages are built the first time they are shown (or prefetched), so the first screen appears as soon as possible.
+        """
+
+        self.frames = {}
+        self.frame_classes = {widget_class.__name__: widget_class for widget_class in self.f_list}
+        self.game_children = []
+
+    def run_handler(self, subscription: UpdateSubscription, profiling: bool) -> None:
+        """Invoke a subscribed function, timing it if the frame profiler is on.
+
+        Args:
+            subscription (UpdateSubscription): Subscription to run.
+            profiling (bool): Whether to time it.
+        """
+
+        if not profiling:
+            subscription.func()
+            return
+
+        start = current_time()
+        subscription.func()
+        self.frame_profiler.record(subscription.name, current_time() - start)
+
+    def toggle_profiler_overlay(self, event=None) -> None:
+        """Show or hide the frame profiler overlay. If the profiler is off, it is turned on while the overlay is shown,
+        without writing any report file.
+        """
+
+        self.profiler_overlay = not self.profiler_overlay
+
+        if self.profiler_overlay:
+            if not self.frame_profiler.enabled:
+                self.frame_profiler.enable()
+                self.profiler_overlay_owns_profiler = True
+
+        else:
+            if self.profiler_overlay_owns_profiler:
+                self.frame_profiler.disable()
+                self.profiler_overlay_owns_profiler = False
+
+            if self.profiler_overlay_item is not None:
+                self.profiler_overlay_canvas.delete(self.profiler_overlay_item)
+                self.profiler_overlay_item = None
+
+    def update_profiler_overlay(self) -> None:
+        """Draw the frame profiler summary in the corner of the current frame's canvas.
+        """
+
+        now = current_time()
+        if now - self.profiler_overlay_updated < self.profiler_overlay_interval: return
+        self.profiler_overlay_updated = now
+
+        canvas = getattr(self.current_frame, 'canvas', None)
+        if canvas is None: return
+
+        # Move the overlay over when the screen changes
+        if canvas is not self.profiler_overlay_canvas and self.profiler_overlay_item is not None:
+            self.profiler_overlay_canvas.delete(self.profiler_overlay_item)
+            self.profiler_overlay_item = None
+
+        text = self.frame_profiler.get_overlay_text()
+        if self.profiler_overlay_item is None:
+            self.profiler_overlay_canvas = canvas
+            self.profiler_overlay_item = canvas.create_text(8, self.height - 8, text=text, anchor=tk.SW, fill='yellow', font=('Courier', 9))
+        else:
+            canvas.itemconfigure(self.profiler_overlay_item, text=text)
+            canvas.tag_raise(self.profiler_overlay_item)
 
     def get_animation_frame_delay(self) -> int: #the timing between the swap of each animation frame
         return 1000//self.animation_fps
 
     def update(self) -> None:
+        # Number of fixed logic steps due since the last tick (more than 1 if the loop is running late)
+        steps = self.frame_scheduler.begin_tick()
+
         # Call all subscribed update_event_handler to run the core game loop
-        for func in self.update_event_handler:
-            func()
+        # Only the handlers of the screen being shown run, inactive screens cost nothing
+        if steps:
+            profiling = self.frame_profiler.enabled
+            if profiling: self.frame_profiler.begin_tick()
+
+            for _ in range(steps):
+                for subscription in self.get_active_handlers(self.update_event_handler):
+                    self.run_handler(subscription, profiling)
+
+            # Render once, however many logic steps were needed to catch up
+            for subscription in self.get_active_handlers(self.render_event_handler):
+                self.run_handler(subscription, profiling)
+
+            if profiling:
+                # Let Tk redraw now instead of when idle, so its share of the frame is measured too
+                with self.frame_profiler.measure('tk redraw'):
+                    self.update_idletasks()
+                self.frame_profiler.end_tick()
+
+                if self.profiler_overlay: self.update_profiler_overlay()
 
         # self.after is provided by tinker where after the delay, update(self) will run again
-        # which creates an update loop to run the game
-        self.after(self.get_animation_frame_delay(), self.update)
+        # which creates an update loop to run the game. The delay is measured up to the next deadline,
+        # so the time spent in the handlers above does not slow the loop down.
+        self.after(self.frame_scheduler.get_delay(), self.update)
 
 if __name__ == '__main__':
     width, height = 800, 600
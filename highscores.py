@@ -0,0 +1,291 @@
+# Command line interface
+import argparse
+
+# Highscore database
+import os
+import sqlite3
+
+# Streaming leaderboards
+import heapq
+from itertools import chain
+
+# Background highscore worker
+import queue
+import threading
+
+# Better type hinting
+from typing import *
+
+
+def is_float(element: any) -> bool:
+    """Check whether a value is convertable to float.
+
+    Args:
+        element (any): Input variable.
+
+    Returns:
+        bool: Whether the input variable can be converted to float.
+    """
+    try:
+        float(element)
+        return True
+    except ValueError:
+        return False
+
+
+def read_highscore_file(path: str) -> Iterator[Tuple[str, float]]:
+    """Read a text highscore file (name,time per line) one line at a time. Malformed lines are skipped,
+    and bytes that are not valid text are replaced rather than failing the whole file.
+
+    Args:
+        path (str): File path of the highscore file.
+
+    Yields:
+        Tuple[str, float]: (name, time) of each score in the file.
+    """
+
+    with open(path, errors='replace') as f:
+        for line in f:
+            split_line = line.strip().split(',') # Get the name, score
+            if len(split_line) == 2 and is_float(split_line[1]): # Confirm only name and score is in the line
+                yield split_line[0], float(split_line[1])
+
+
+def get_top_highscores(paths: Iterable[str], count: int = 10) -> List[Tuple[str, float]]:
+    """Merge text highscore files into one leaderboard, e.g. the per-difficulty or per-machine files.
+    The files are streamed and only the best count scores are kept in a heap, so this takes
+    O(n log count) time and O(count) memory however long the files are.
+
+    Args:
+        paths (Iterable[str]): File paths of the highscore files.
+        count (int, optional): Number of scores to get. Defaults to 10.
+
+    Returns:
+        List[Tuple[str, float]]: (name, time) of the best scores, fastest first.
+    """
+
+    scores = chain.from_iterable(read_highscore_file(path) for path in paths)
+    return heapq.nsmallest(count, scores, key=lambda score: score[1])
+
+
+class HighscoreStore():
+    """Hall of Fame storage. All difficulties share one SQLite database.
+
+    Scores are indexed on (difficulty, time), so adding a score is O(log n) and the top scores
+    are read straight off the index instead of sorting the whole history. SQLite's journal keeps
+    the database intact if the game crashes or the machine loses power in the middle of a write.
+    The old highscores{difficulty}.txt files are imported once, the first time they are seen.
+
+    Members:
+        path (str): File path of the database.
+        connection (sqlite3.Connection): Open database connection.
+        legacy_file_format (str): File name of the old text highscore files, formatted with the difficulty.
+    """
+
+    legacy_file_format: str = 'highscores{}.txt'
+
+    def __init__(self, path: str = 'highscores.db', legacy_directory: str = '.', legacy_difficulties: Iterable[int] = (1, 2, 3)):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=10) # Wait for other game windows writing at the same time
+
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS scores (difficulty INTEGER NOT NULL, name TEXT NOT NULL, time REAL NOT NULL)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS scores_difficulty_time ON scores (difficulty, time)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS migrated_files (path TEXT PRIMARY KEY)')
+
+        self.migrate_legacy_files(legacy_directory, legacy_difficulties)
+
+    def add_score(self, difficulty: int, name: str, time: float) -> None:
+        """Record a score.
+
+        Args:
+            difficulty (int): Difficulty the round was played on.
+            name (str): Player name.
+            time (float): Time taken to finish the round.
+        """
+
+        with self.connection:
+            self.connection.execute('INSERT INTO scores (difficulty, name, time) VALUES (?, ?, ?)', (difficulty, name, time))
+
+    def get_top_scores(self, difficulty: int, count: int = 10) -> List[Tuple[str, float]]:
+        """Gets the best (fastest) scores for a difficulty.
+
+        Args:
+            difficulty (int): Difficulty to get the scores for.
+            count (int, optional): Number of scores to get. Defaults to 10.
+
+        Returns:
+            List[Tuple[str, float]]: (name, time) of the best scores, fastest first.
+        """
+
+        return self.connection.execute('SELECT name, time FROM scores WHERE difficulty = ? ORDER BY time, rowid LIMIT ?',
+                                       (difficulty, count)).fetchall()
+
+    def migrate_legacy_files(self, directory: str, difficulties: Iterable[int]) -> None:
+        """Import the old text highscore files that have not been imported yet. Each file is imported in one transaction,
+        so an interrupted import is rolled back and simply runs again next time. A file that can not be read is skipped.
+
+        Files are recorded by their path relative to the database, so moving the game folder (database and files together)
+        does not import them again.
+
+        Args:
+            directory (str): Directory of the old highscore files.
+            difficulties (Iterable[int]): Difficulties to look for files of.
+        """
+
+        database_directory = os.path.dirname(os.path.abspath(self.path))
+
+        for difficulty in difficulties:
+            path = os.path.abspath(os.path.join(directory, self.legacy_file_format.format(difficulty)))
+            if not os.path.exists(path):
+                continue
+
+            # Databases made before files were recorded relative to them hold the absolute path
+            if self.connection.execute('SELECT 1 FROM migrated_files WHERE path = ?', (path,)).fetchone():
+                continue
+
+            try:
+                with self.connection:
+                    # Claim the file first. Fails if it was already imported, maybe by another game window.
+                    self.connection.execute('INSERT INTO migrated_files (path) VALUES (?)', (os.path.relpath(path, database_directory),))
+
+                    self.connection.executemany('INSERT INTO scores (difficulty, name, time) VALUES (?, ?, ?)',
+                                                ((difficulty, name, time) for name, time in read_highscore_file(path)))
+
+            except sqlite3.IntegrityError:
+                continue
+
+            except (OSError, ValueError) as e:
+                print("Old highscore file skipped:", path, e)
+
+    def close(self) -> None:
+        """Close the database connection.
+        """
+        self.connection.close()
+
+
+class HighscoreWorker():
+    """Runs a HighscoreStore on a background thread, so slow disks (e.g. network-mounted home directories)
+    never freeze the game. Requests are queued to the worker thread and run in order. Their results are
+    handed back to the Tk loop by polling with after(), so callbacks are safe to touch widgets.
+
+    Writers in other game windows are serialised by the database's own locking.
+
+    Members:
+        root (tk.Misc): Widget whose after() runs the callbacks on the Tk thread.
+        poll_interval (int): Delay between checks for finished requests in ms.
+        requests (queue.Queue): Requests waiting for the worker thread.
+        results (queue.Queue): Finished requests waiting for their callback to run on the Tk thread.
+        pending (int): Number of requests with a callback that has not run yet.
+    """
+
+    def __init__(self, root, store_factory: Callable[[], HighscoreStore] = HighscoreStore, poll_interval: int = 50):
+        self.root = root
+        self.store_factory = store_factory
+        self.poll_interval = poll_interval
+
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.pending = 0
+
+        # The store is created on the worker thread, SQLite connections can only be used by the thread that made them
+        self.thread = threading.Thread(target=self.run, name='HighscoreWorker', daemon=True)
+        self.thread.start()
+
+    def run(self) -> None:
+        """Worker thread loop. Runs the requests until close is called.
+        If the store can not be opened, every request fails (its callback gets None) instead.
+        """
+
+        try:
+            store = self.store_factory()
+        except Exception as e:
+            print("Highscores unavailable:", e)
+            store = None
+
+        while True:
+            request = self.requests.get()
+            if request is None: # Closed
+                break
+
+            method, args, callback = request
+            result = None
+            if store is not None:
+                try:
+                    result = getattr(store, method)(*args)
+                except Exception as e: # Any failure, the thread has to keep serving and the callback still has to run
+                    print("Highscore request failed:", method, e)
+
+            if callback:
+                self.results.put((callback, result))
+
+        if store is not None:
+            store.close()
+
+    def submit(self, method: str, args: tuple, callback: Callable[[any], None] = None) -> None:
+        """Queue a HighscoreStore method call on the worker thread.
+
+        Args:
+            method (str): Name of the HighscoreStore method.
+            args (tuple): Arguments for the method.
+            callback (Callable[[any], None], optional): Invoked on the Tk thread with the result (None if it failed). Defaults to None.
+        """
+
+        if callback:
+            # Start polling for results if nothing else is waiting
+            if not self.pending:
+                self.root.after(self.poll_interval, self.poll)
+            self.pending += 1
+
+        if not self.thread.is_alive():
+            # Worker already stopped, nothing will run the request
+            if callback:
+                self.results.put((callback, None))
+            return
+
+        self.requests.put((method, args, callback))
+
+    def poll(self) -> None:
+        """Run the callbacks of finished requests. Keeps polling while requests are pending,
+        even if a callback raises.
+        """
+
+        try:
+            while not self.results.empty():
+                callback, result = self.results.get_nowait()
+                self.pending -= 1
+                callback(result)
+        finally:
+            if self.pending:
+                self.root.after(self.poll_interval, self.poll)
+
+    def add_score(self, difficulty: int, name: str, time: float, callback: Callable[[None], None] = None) -> None:
+        """Record a score in the background. See HighscoreStore.add_score.
+        """
+        self.submit('add_score', (difficulty, name, time), callback)
+
+    def get_top_scores(self, difficulty: int, count: int, callback: Callable[[List[Tuple[str, float]]], None]) -> None:
+        """Read the best scores in the background. See HighscoreStore.get_top_scores.
+        Queued after any score added before it, so a new score shows up in the result.
+        """
+        self.submit('get_top_scores', (difficulty, count), callback)
+
+    def close(self, timeout: float = 5) -> None:
+        """Finish the queued requests and stop the worker thread.
+
+        Args:
+            timeout (float, optional): Time in seconds to wait for the queued requests. Defaults to 5.
+        """
+
+        self.requests.put(None)
+        self.thread.join(timeout)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Merge text highscore files into one leaderboard.')
+    parser.add_argument('files', nargs='+', help='highscore files, e.g. highscores1.txt from every machine')
+    parser.add_argument('-n', '--count', type=int, default=10, help='number of scores to show')
+    args = parser.parse_args()
+
+    for rank, (name, time) in enumerate(get_top_highscores(args.files, args.count), 1):
+        print(f'{rank:>3}. {name:<20}{time}s')
@@ -1,3 +1,7 @@
+# Command line options
+import argparse
+import os
+
 # GUI library
 import tkinter as tk
 from tkinter import ttk, font as tkfont
@@ -12,21 +16,14 @@ from typing import *
 import gameclasses as gc
 import game_scrambled as game
 
+# Hall of Fame storage
+from highscores import HighscoreWorker
 
-def is_float(element: any) -> bool:
-    """Check whether a value is convertable to float.
-
-    Args:
-        element (any): Input variable.
+# Word rotation across rounds
+from rotation import WordRotation
 
-    Returns:
-        bool: Whether the input variable can be converted to float.
-    """
-    try:
-        float(element)
-        return True
-    except ValueError:
-        return False
+# Startup tracing
+from profiling import startup_tracer
 
 
 """
@@ -44,6 +41,7 @@ class MainApp(gc.GameRoot):
         difficulty (int): Currently selected difficulty level of the game. {Easy:1, Medium:2, Hard: 3}
         last_score (int): The last highscore in the current game session.
         last_name (str): The name of the last player who got a score.
+        highscores (HighscoreWorker): Hall of Fame storage, running on a background thread.
     """
 
     #Setting variables with temporary placeholders
@@ -52,20 +50,45 @@ class MainApp(gc.GameRoot):
     last_name: str = ""
 
     def __init__(self, width, height, animation_fps, frames_list, *args, **kwargs):
-        super().__init__(width, height, animation_fps, frames_list, *args, **kwargs)
+        with startup_tracer.phase('tk init'):
+            super().__init__(width, height, animation_fps, frames_list, *args, **kwargs)
 
         # Loading fonts
-        self.title_font = tkfont.Font(family='Comic Sans Ms', size=24, weight="bold")
-        self.button_font = tkfont.Font(family='Comic Sans Ms', size=14, weight="bold")
-        self.header_font = tkfont.Font(family='Comic Sans Ms', size=18, weight="bold")
-        self.meme_font = tkfont.Font(family='Papyrus', size=16, weight="bold")
-        self.big_meme_font = tkfont.Font(family='Papyrus', size=20, weight="bold")
-        self.content_font = tkfont.Font(family='Comic Sans Ms', size=14, weight="bold")
-
-        self.load_frames()
-
-        self.show_frame(MainMenuFrame)
+        with startup_tracer.phase('fonts'):
+            self.title_font = tkfont.Font(family='Comic Sans Ms', size=24, weight="bold")
+            self.button_font = tkfont.Font(family='Comic Sans Ms', size=14, weight="bold")
+            self.header_font = tkfont.Font(family='Comic Sans Ms', size=18, weight="bold")
+            self.meme_font = tkfont.Font(family='Papyrus', size=16, weight="bold")
+            self.big_meme_font = tkfont.Font(family='Papyrus', size=20, weight="bold")
+            self.content_font = tkfont.Font(family='Comic Sans Ms', size=14, weight="bold")
+
+        # Hall of Fame (imports the old highscores{difficulty}.txt files on first run)
+        with startup_tracer.phase('highscores'):
+            self.highscores = HighscoreWorker(self)
+        self.protocol("WM_DELETE_WINDOW", self.on_close) # Let queued scores finish saving on exit
+
+        with startup_tracer.phase('load_frames'):
+            self.load_frames()
+
+        # Build the screens players are likely to go to next in the background. The end screens are built
+        # while the difficulty is being picked, never while a round is running, where decoding images would stall it.
+        self.frame_prefetch = {
+            MainMenuFrame: [DifficultyFrame],
+            DifficultyFrame: [GameFrame, EndWinFrame, EndLoseFrame],
+        }
+
+        with startup_tracer.phase('show_frame MainMenuFrame'):
+            self.show_frame(MainMenuFrame)
+
+        # Interactive once Tk has drawn the menu and goes idle
+        self.after_idle(startup_tracer.mark_interactive)
+
+    def on_close(self) -> None:
+        """Called when the window is closed. Waits for the highscores to be saved before quitting.
+        """
 
+        self.highscores.close()
+        self.destroy()
 
 
 """
@@ -355,6 +378,16 @@ class GameFrame(gc.GameFrame):
         r'assets/Mouse_frame08.png',
     ]
 
+    # Frames per second of the cat and mouse run cycle
+    run_cycle_fps: float = 12
+
+    # Cat is shown at 1/2 and mouse at 1/4 the size of the original images.
+    # Pre-scaled sprite sheets of both are built by build_atlas.py.
+    cat_subsample: int = 2
+    mouse_subsample: int = 4
+    cat_atlas: str = r'assets/Cat_atlas.json'
+    mouse_atlas: str = r'assets/Mouse_atlas.json'
+
     # Set the starting x,y coordinates of the Cat and Mouse sprites
     mouse_start_x: int = 600
     mouse_start_y: int = 550
@@ -378,6 +411,14 @@ class GameFrame(gc.GameFrame):
     end_anim_house_duration: float = 1.8
     end_anim_mouseescape_duration: float = 3
 
+    # Worked out by the logic step (update), drawn by the render step (render)
+    step_time: float = 0 # Clock reading of the last logic step
+    scroll_background: bool = True
+    house_x: float = 1200
+    tree_x: float = 200
+    rendered_house_x: float = None
+    rendered_tree_x: float = None
+
     game_instance = None
 
     def __init__(self, parent, root):
@@ -387,6 +428,7 @@ class GameFrame(gc.GameFrame):
         # Question label
         self.label_qn = tk.Label(self, text='', background='white', font=root.title_font)
         self.label_qn.place(x=400, y=200, anchor='s')
+        self.text_qn = self.bind_text(self.label_qn)
 
         # Question frame
         self.frame_ans = tk.Frame(self, background='white')
@@ -397,6 +439,7 @@ class GameFrame(gc.GameFrame):
         # Coolness Label
         self.label_cool = tk.Label(self.frame_ans, text='', font=root.meme_font, background='white')
         self.label_cool.place(x=650, y=44, anchor='center')
+        self.text_cool = self.bind_text(self.label_cool)
 
         # Question entry
         self.answer_input = tk.StringVar()
@@ -415,10 +458,12 @@ class GameFrame(gc.GameFrame):
         # loop the background again
 
         # Set the cat, resized to be 1/2 the size of the original image
-        self.animspr_cat = gc.AnimatedSprite(root, self.cat_start_x, self.cat_start_y, self.canvas, self.cat_sequence, subsample=2)
+        cat_frames = gc.load_image_sequence(self.cat_sequence, self.cat_subsample, self.cat_atlas)
+        self.animspr_cat = gc.AnimatedSprite(root, self.cat_start_x, self.cat_start_y, self.canvas, cat_frames, animation_fps=self.run_cycle_fps)
 
         # Set the mouse, resized to be 1/4 of the size of the original image
-        self.animspr_mouse = gc.AnimatedSprite(root, self.mouse_start_x, self.mouse_start_y, self.canvas, self.mouse_sequence, subsample=4)
+        mouse_frames = gc.load_image_sequence(self.mouse_sequence, self.mouse_subsample, self.mouse_atlas)
+        self.animspr_mouse = gc.AnimatedSprite(root, self.mouse_start_x, self.mouse_start_y, self.canvas, mouse_frames, animation_fps=self.run_cycle_fps)
 
         # Tree is the starting point, located at the front of the background
         self.spr_tree = gc.Sprite(100, 590, self.canvas, r'assets/tree.png', anchor=tk.S)
@@ -433,6 +478,7 @@ class GameFrame(gc.GameFrame):
         # Time/Score display
         self.label_time = tk.Label(self, text='Time: 0', font=root.header_font, background='#C3EEFF')
         self.label_time.grid(row=0, column=2, sticky='ne', padx=12, pady=12)
+        self.text_time = self.bind_text(self.label_time) # Only changes every 0.1s, the binding skips the ticks in between
 
         # End game button (goes to lose screen)
         def on_end_game_pressed():
@@ -447,12 +493,16 @@ class GameFrame(gc.GameFrame):
 
 
         self.game_instance = game.GameScrambled()
+        self.game_instance.rotation = WordRotation() # Avoid serving the same words round after round on a shared computer
         self.game_instance.on_win_callback = self.on_win
         self.game_instance.on_question_callback = self.on_question
 
         self.enabled = False
 
-        self.root.update_event_handler.append(self.update)
+        # Only run while the game screen is shown. The canvas and labels are only drawn once per tick,
+        # however many logic steps the frame scheduler runs to catch up.
+        self.update_subscription = root.subscribe(self.update, scope=self)
+        self.render_subscription = root.subscribe(self.render, scope=self, render=True)
 
     # Super function overrides
     def on_enable(self) -> None:
@@ -465,11 +515,12 @@ class GameFrame(gc.GameFrame):
         self.animspr_mouse.enabled = True
 
         # From game_scrambled initiate_game take in arguments difficulty and cat_initial points
+        # The player is not known before the round (last_name is the previous Hall of Fame entry), so words rotate per difficulty
         self.game_instance.initiate_game(self.root.difficulty, -10) # Set the cat_initial points to be -10
         self.game_instance.get_current_scrambled_word() # Get the scrambled words
 
         # Set the location of the house (ending of the game) outside of the window screen for now
-        self.canvas.coords(self.spr_house.sprite, 1200, 590)
+        self.house_x = 1200
         self.animspr_mouse.x = self.mouse_start_x # Set the initial coordinate for the mouse
         self.label_qn.place(x=400, y=200, anchor='s')
         self.frame_ans.place(x=400, y=220, width=800, height=88, anchor='n')
@@ -505,15 +556,15 @@ class GameFrame(gc.GameFrame):
         self.begin_anim_playing = True
 
         # Set the tree as the tree is the starting animation
-        self.canvas.coords(self.spr_tree.sprite, 200, 590)
+        self.tree_x = 200
         self.begin_anim_start = current_time() # Get the current time the begin animation starts
 
-    def begin_ending_animation(self) -> None:
+    def begin_ending_animation(self, state: game.GameState) -> None:
         self.end_anim_playing = True
-        self.end_anim_start = current_time() # Get the current time the end animation starts
+        self.end_anim_start = state.now # The end animation starts when the round ended
 
         # Setting the position between the cat and mouse where the game ends
-        self.end_anim_cat_end_position = int(self.mouse_start_x - ((self.mouse_start_x - 200)/self.game_instance.fast_win_points)*self.game_instance.get_cat_dist_from_mouse() - 200)
+        self.end_anim_cat_end_position = int(self.mouse_start_x - ((self.mouse_start_x - 200)/self.game_instance.fast_win_points)*state.cat_dist - 200)
 
     # Callbacks
     def on_question(self, scrambled_word: str) -> None:
@@ -522,7 +573,8 @@ class GameFrame(gc.GameFrame):
         Args:
             scrambled_word (str): Scrambled word for the new question.
         """
-        self.label_qn.config(text=f'{scrambled_word}') # Show the scrambled word on the screen
+        self.text_qn.set(f'{scrambled_word}') # Show the scrambled word on the screen
+        self.after_idle(self.game_instance.prepare_questions) # Scramble the next question while the player is thinking
 
     def on_win(self, win_type: game.GameScrambled.WinType) -> None:
         """Callback function that is invoked on a winning condition.
@@ -532,7 +584,9 @@ class GameFrame(gc.GameFrame):
         """
         print(f'Win type: {win_type}')
 
-        self.game_end_time = current_time()
+        state = self.game_instance.state # Snapshot the round ended on
+        self.game_end_time = state.now # Get the time the game ends
+        self.root.frame_profiler.dump() # Write the frame times of this round (if profiling)
 
         if win_type == game.GameScrambled.WinType.LOSE:
             # Lose
@@ -540,14 +594,14 @@ class GameFrame(gc.GameFrame):
             self.enabled = False
             self.animspr_cat.enabled = False
             self.animspr_mouse.enabled = False
+            self.game_instance.finish_round() # Nothing to play on a loss
             self.root.show_frame(EndLoseFrame) # Redirect to lose frame
 
         else:
             # Win!!
             self.label_qn.place_forget() # Hide question frames
             self.frame_ans.place_forget() # Hide input box widget
-            self.begin_ending_animation()
-            self.game_end_time = current_time() # Get the current time the game ends
+            self.begin_ending_animation(state)
             self.root.last_score = self.get_gameplay_duration( )
 
     # Helper functions
@@ -574,52 +628,26 @@ class GameFrame(gc.GameFrame):
 
     # Update loop
     def update(self):
+        """Logic step. Advances the round and works out where everything goes, the canvas and labels are drawn in render.
+        """
+
         if not self.enabled: return # Game not running
-        c_time = self.get_time() # get current time
+        now = current_time() # Read the clock once, so the whole step agrees on the time
+        self.step_time = now
 
         if not self.end_anim_playing:# Game is still running, ending animation not yet
-            self.game_instance.check_cat_position()
+            # One snapshot of the round for this step, from the same clock reading
+            state = self.game_instance.take_snapshot(now)
+            self.game_instance.check_cat_position(state)
 
-            self.move_background(c_time)
+            self.scroll_background = True
 
-            # Constantly update the x coordinate of the car base on the points earn(get_cat_dist_from_mouse())
+            # Constantly update the x coordinate of the car base on the points earn(cat_dist)
             # Gives the impression that the cat is moving closer to the mouse when the difference in points between cat and mouse decreases
-            self.animspr_cat.x = int(self.mouse_start_x - ((self.mouse_start_x - 200)/self.game_instance.fast_win_points)*self.game_instance.get_cat_dist_from_mouse() - 200)
-
-            # Update time/score
-            self.label_time.config(text=f'Time: {round(self.get_time(), 1)}')
-
-            # Update cool text
-            cool_time = current_time() - self.cool_text_start # Get the current time - time the question was checked
-
-            # Checks that the check_ans() function just ran
-            if cool_time < self.cool_text_duration:
-                cool_text = ''
-
-                # Show comments based on the points
-                if self.last_score == -3:
-                    cool_text = 'Skipped'
-                elif self.last_score == -1:
-                    cool_text = 'Wrong answer'
-                elif self.last_score == 1:
-                    cool_text = 'not bad...try to be quicker!'
-                elif self.last_score == 2:
-                    cool_text = 'Getting the hang of it?'
-                elif self.last_score == 3:
-                    cool_text = 'Noice.'
-                elif self.last_score == 4:
-                    cool_text = 'WOW!'
-                elif self.last_score == 5:
-                    cool_text = 'AWESOME!!'
-
-                self.label_cool.configure(text=cool_text)
-
-            else: # Don't show anything on downtime
-                self.label_cool.configure(text='')
-
+            self.animspr_cat.x = int(self.mouse_start_x - ((self.mouse_start_x - 200)/self.game_instance.fast_win_points)*state.cat_dist - 200)
 
         else: # Game ending
-            c_end_time = current_time() - self.end_anim_start
+            c_end_time = now - self.end_anim_start
             # Current time - time the end animation start to get when end animation should end
             # End animation ends when current time = end_animation_start time, c_end_time = 0
 
@@ -631,8 +659,7 @@ class GameFrame(gc.GameFrame):
 
             """<END ANIMATION RUNNING>"""
 
-            if mouse_anim_time < 0: # End animation hasn't ended, background still moves
-                self.move_background(c_time)
+            self.scroll_background = mouse_anim_time < 0 # End animation hasn't ended, background still moves
 
             if cat_anim_time < self.end_anim_catescape_duration:
                 # X coordinate is now towards 0 as the cat slowly leaves the screen
@@ -641,8 +668,7 @@ class GameFrame(gc.GameFrame):
 
             elif house_anim_time < self.end_anim_house_duration:
                 # House appears onto the screen at the end to signify the ending
-                house_x = 1200 - house_anim_time * self.scroll_speed
-                self.canvas.coords(self.spr_house.sprite, house_x, 590)
+                self.house_x = 1200 - house_anim_time * self.scroll_speed
 
             elif mouse_anim_time < self.end_anim_mouseescape_duration:
                 # Mouse starts to move forward towards house
@@ -652,6 +678,7 @@ class GameFrame(gc.GameFrame):
             else:
                 # c_end_time = 0, end animation ends, all animation has played, conclude
                 self.end_anim_playing = False
+                self.game_instance.finish_round()
 
                 # Stop animations
                 self.enabled = False
@@ -662,12 +689,63 @@ class GameFrame(gc.GameFrame):
                 self.root.show_frame(EndWinFrame)
 
         if self.begin_anim_playing: # If the game just started
-            c_begin_time = current_time() - self.begin_anim_start
-            new_x = 200 - c_begin_time*self.scroll_speed
+            c_begin_time = now - self.begin_anim_start
 
             # Set the tree location as tree is in beginning animation
-            self.canvas.coords(self.spr_tree.sprite, new_x, 590)
-            self.begin_anim_playing = new_x > -300
+            self.tree_x = 200 - c_begin_time*self.scroll_speed
+            self.begin_anim_playing = self.tree_x > -300
+
+    def render(self):
+        """Render step. Draws what the last logic step worked out, once per tick.
+        """
+
+        if not self.enabled: return # Game not running
+        c_time = self.step_time - self.start_time # get current time
+
+        if self.scroll_background:
+            self.move_background(c_time)
+
+        # Only move the house and tree when they have moved
+        if self.house_x != self.rendered_house_x:
+            self.canvas.coords(self.spr_house.sprite, self.house_x, 590)
+            self.rendered_house_x = self.house_x
+
+        if self.tree_x != self.rendered_tree_x:
+            self.canvas.coords(self.spr_tree.sprite, self.tree_x, 590)
+            self.rendered_tree_x = self.tree_x
+
+        if self.end_anim_playing: return # Labels are hidden during the ending
+
+        # Update time/score
+        self.text_time.set(f'Time: {round(c_time, 1)}')
+
+        # Update cool text
+        cool_time = self.step_time - self.cool_text_start # Get the current time - time the question was checked
+
+        # Checks that the check_ans() function just ran
+        if cool_time < self.cool_text_duration:
+            cool_text = ''
+
+            # Show comments based on the points
+            if self.last_score == -3:
+                cool_text = 'Skipped'
+            elif self.last_score == -1:
+                cool_text = 'Wrong answer'
+            elif self.last_score == 1:
+                cool_text = 'not bad...try to be quicker!'
+            elif self.last_score == 2:
+                cool_text = 'Getting the hang of it?'
+            elif self.last_score == 3:
+                cool_text = 'Noice.'
+            elif self.last_score == 4:
+                cool_text = 'WOW!'
+            elif self.last_score == 5:
+                cool_text = 'AWESOME!!'
+
+            self.text_cool.set(cool_text)
+
+        else: # Don't show anything on downtime
+            self.text_cool.set('')
 
 
 
@@ -689,7 +767,7 @@ class EndWinFrame(gc.GameFrame):
         self.root = root
 
         # Setting background
-        self.background_image2 = tk.PhotoImage(file="./assets/You Win.png")
+        self.background_image2 = gc.image_cache.get("./assets/You Win.png")
         label = tk.Label(self, image=self.background_image2, compound = "center")
         label.grid(row=0, column=0)
 
@@ -732,6 +810,8 @@ class EndWinFrame(gc.GameFrame):
         self.btn_play_again = ttk.Button(self, text="Play Again",
                            command=lambda: root.show_frame(MainMenuFrame)) # Redirect back to main screen
 
+        self.labels_score = []
+
     def on_enable(self):
         # Disable play again button
         self.btn_play_again.grid_forget()
@@ -742,10 +822,9 @@ class EndWinFrame(gc.GameFrame):
         def on_enter_name(event):
             self.root.last_name = self.entry_name.get() # Get the input from input_box
 
-            # Save highscore in a txt file
+            # Save highscore (in the background)
             if self.root.last_name != '':
-                with open(f'highscores{self.root.difficulty}.txt', 'a+') as f:
-                    f.write(f'{self.root.last_name},{self.root.last_score}\n') # append to txt file name, score
+                self.root.highscores.add_score(self.root.difficulty, self.root.last_name, self.root.last_score)
 
             self.show_highscores()
         self.entry_name.bind("<Return>", on_enter_name) # Bind enter key to trigger on_enter_name() function
@@ -767,26 +846,22 @@ class EndWinFrame(gc.GameFrame):
         self.frame_hs.grid(row=0, column=0, ipady=10)
         self.btn_play_again.grid(row=0, column=0, pady=(20, 20), sticky='s') # Enable play again button
 
-        # Read from highscore file
-        scores: list = []
-        with open(f'highscores{self.root.difficulty}.txt','a+') as f:
-            f.seek(0)
-            while True:
-                line = f.readline()
-                if not line:
-                    break
-                split_line = line.strip().split(',') # Get the name, score
-                if len(split_line) == 2 and is_float(split_line[1]): # Confirm only name and score is in the list
-                    split_line[1] = float(split_line[1]) # Get the score
-                    scores.append(tuple(split_line))
-
-        # Sort highscores
-        scores.sort(key=lambda tup: float(tup[1]))
-
-        # Create name and score label sets (only first 10)
+        # Read the 10 best scores in the background, queued after the new score
+        self.root.highscores.get_top_scores(self.root.difficulty, 10, self.show_highscore_labels)
+
+    def show_highscore_labels(self, scores: List[Tuple[str, float]]) -> None:
+        """Callback function that is invoked when the best scores have been read.
+
+        Args:
+            scores (List[Tuple[str, float]]): (name, time) of the best scores, fastest first. None if they could not be read.
+        """
+
+        if not self.enabled or scores is None: return # Player already left the screen
+
+        # Create name and score label sets
         self.labels_score = [(tk.Label(self.frame_hs, text=name, font=self.root.content_font, background='#FFB600'),
                         tk.Label(self.frame_hs, text=f'{time}s', font=self.root.content_font, background='#FFB600'))
-                        for name, time in scores[:10]]
+                        for name, time in scores]
 
         # Grid those labels!
         for i, player_label in enumerate(self.labels_score):
@@ -812,7 +887,7 @@ class EndLoseFrame(gc.GameFrame):
         super().__init__(parent, root)
 
         # Create background
-        self.background_image3 = tk.PhotoImage(file="./assets/You_Lose.png")
+        self.background_image3 = gc.image_cache.get("./assets/You_Lose.png")
 
         # Create labels
         label = tk.Label(self, text="You ded lol",
@@ -837,13 +912,30 @@ class EndLoseFrame(gc.GameFrame):
 
 
 if __name__ == '__main__':
+    # Opt-in startup tracing: --trace-startup [FILE] or CDT1D_TRACE_STARTUP=FILE
+    parser = argparse.ArgumentParser(description='Cat me if you can!')
+    parser.add_argument('--trace-startup', nargs='?', const='startup_trace.json', default=os.environ.get('CDT1D_TRACE_STARTUP'),
+                        metavar='FILE', help='write a Chrome trace of the startup phases and asset loads')
+    parser.add_argument('--profile-frames', nargs='?', const='frame_profile.json', default=os.environ.get('CDT1D_PROFILE_FRAMES'),
+                        metavar='FILE', help='time every game loop tick and write the report when a round ends (F3 shows it on screen)')
+    args = parser.parse_args()
+    if args.trace_startup:
+        startup_tracer.enable(args.trace_startup)
+
     width, height = 800, 600 # Fixed window screen
     target_fps = 60
     # Container of all the frames
     frame_list = [MainMenuFrame, CreditsFrame, InstructionFrame, DifficultyFrame, GameFrame, EndWinFrame, EndLoseFrame]
 
-    app = MainApp(width, height, target_fps, frame_list)
-    app.resizable(False, False)
-    app.title('Cat me if you can! by 21F01 - Team 1J')
-    app.iconbitmap('icon.ico')
+    with startup_tracer.phase('MainApp'):
+        app = MainApp(width, height, target_fps, frame_list)
+
+    if args.profile_frames:
+        app.frame_profiler.enable(args.profile_frames)
+
+    with startup_tracer.phase('window setup'):
+        app.resizable(False, False)
+        app.title('Cat me if you can! by 21F01 - Team 1J')
+        app.iconbitmap('icon.ico')
+
     app.mainloop()
@@ -0,0 +1,252 @@
+# Timing
+from timeit import default_timer as current_time
+from contextlib import contextmanager
+
+# Trace report
+import json
+import os
+
+# Rolling frame statistics
+from collections import deque
+
+# Better type hinting
+from typing import *
+
+
+class StartupTracer():
+    """Records a timeline of the startup phases and asset loads, and writes it as a Chrome trace
+    (open in chrome://tracing or ui.perfetto.dev). Disabled until enable is called, every call is a no-op until then.
+
+    Members:
+        enabled (bool): Whether events are being recorded.
+        output_file (str): File path the report is written to.
+        start_time (float): Time the timeline starts from, when this module was first imported.
+        events (List[dict]): Recorded trace events.
+        time_to_interactive (float): Time in seconds from start_time until the first screen could be used. None until marked.
+    """
+
+    def __init__(self, clock: Callable[[], float] = current_time):
+        self.clock = clock
+        self.enabled = False
+        self.output_file = None
+        self.start_time = clock()
+        self.events = []
+        self.time_to_interactive = None
+
+    def enable(self, output_file: str) -> None:
+        """Start recording events.
+
+        Args:
+            output_file (str): File path the report will be written to.
+        """
+
+        self.enabled = True
+        self.output_file = output_file
+
+    def get_timestamp(self, time: float) -> float:
+        """Convert a clock time to a trace timestamp (microseconds since start_time).
+        """
+        return (time - self.start_time)*1e6
+
+    @contextmanager
+    def phase(self, name: str, category: str = 'startup', **args):
+        """Record how long the code inside the with block takes.
+
+        Args:
+            name (str): Name of the phase.
+            category (str, optional): Trace category. Defaults to 'startup'.
+            args: Extra values to attach to the event.
+        """
+
+        if not self.enabled:
+            yield
+            return
+
+        start = self.clock()
+        try:
+            yield
+        finally:
+            end = self.clock()
+            self.events.append({'name': name, 'cat': category, 'ph': 'X', 'pid': os.getpid(), 'tid': 0,
+                                'ts': self.get_timestamp(start), 'dur': (end - start)*1e6, 'args': args})
+
+    def asset(self, path: str):
+        """Record loading an asset file, with its size.
+
+        Args:
+            path (str): File path of the asset.
+        """
+
+        if not self.enabled:
+            return self.phase(path)
+
+        return self.phase(f'load {os.path.basename(path)}', 'asset', file=path, size=os.path.getsize(path))
+
+    def mark_interactive(self) -> None:
+        """Mark the moment the first screen can be used, then write the report and stop recording.
+        """
+
+        if not self.enabled:
+            return
+
+        now = self.clock()
+        self.time_to_interactive = now - self.start_time
+        self.events.append({'name': 'interactive', 'cat': 'startup', 'ph': 'i', 's': 'g', 'pid': os.getpid(), 'tid': 0,
+                            'ts': self.get_timestamp(now)})
+
+        self.write_report()
+        self.enabled = False
+        print(f"Time to interactive: {self.time_to_interactive*1000:.0f} ms, startup trace written to {self.output_file}")
+
+    def write_report(self) -> None:
+        """Write the recorded events to output_file in Chrome trace format.
+        """
+
+        report = {
+            'traceEvents': self.events,
+            'displayTimeUnit': 'ms',
+            'otherData': {
+                'time_to_interactive_ms': None if self.time_to_interactive is None else self.time_to_interactive*1000,
+                'asset_bytes': sum(event['args'].get('size', 0) for event in self.events if event['cat'] == 'asset'),
+            },
+        }
+
+        with open(self.output_file, 'w') as f:
+            json.dump(report, f, indent=1)
+
+
+class FrameProfiler():
+    """Times every tick of the game loop and every handler run in it, keeping the last window ticks
+    for rolling percentiles. Disabled until enable is called, then GameRoot does not time anything.
+
+    Members:
+        enabled (bool): Whether ticks are being timed.
+        output_file (str): File path dump writes to. None to only keep the rolling statistics (e.g. for the overlay).
+        window (int): Number of recent ticks kept.
+        frame_times (deque): Total time of each recent tick in seconds.
+        handler_times (Dict[str, deque]): Time spent in each handler in each recent tick in seconds.
+        tick_handler_times (Dict[str, float]): Handler times of the tick being timed.
+    """
+
+    percentiles: Tuple[int, ...] = (50, 95, 99)
+
+    def __init__(self, window: int = 600, clock: Callable[[], float] = current_time):
+        self.clock = clock
+        self.window = window
+        self.enabled = False
+        self.output_file = None
+
+        self.frame_times = deque(maxlen=window)
+        self.handler_times = {}
+        self.tick_handler_times = {}
+        self.tick_start = 0.0
+
+    def enable(self, output_file: str = None) -> None:
+        """Start timing ticks.
+
+        Args:
+            output_file (str, optional): File path dump writes to. Defaults to None (dump writes nothing).
+        """
+
+        self.enabled = True
+        self.output_file = output_file
+
+    def disable(self) -> None:
+        """Stop timing ticks. The statistics so far are kept.
+        """
+
+        self.enabled = False
+        self.output_file = None
+
+    def begin_tick(self) -> None:
+        self.tick_start = self.clock()
+        self.tick_handler_times = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        """Add time spent in a handler to the tick being timed.
+
+        Args:
+            name (str): Handler name.
+            seconds (float): Time spent.
+        """
+
+        self.tick_handler_times[name] = self.tick_handler_times.get(name, 0.0) + seconds
+
+    @contextmanager
+    def measure(self, name: str):
+        """Record the time the code inside the with block takes against a handler name.
+        """
+
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.record(name, self.clock() - start)
+
+    def end_tick(self) -> None:
+        self.frame_times.append(self.clock() - self.tick_start)
+
+        for name, seconds in self.tick_handler_times.items():
+            if name not in self.handler_times:
+                self.handler_times[name] = deque(maxlen=self.window)
+            self.handler_times[name].append(seconds)
+
+    def get_percentiles(self, samples: Iterable[float]) -> Dict[str, float]:
+        """Gets the percentiles of a set of samples in ms (nearest rank).
+
+        Args:
+            samples (Iterable[float]): Samples in seconds.
+
+        Returns:
+            Dict[str, float]: Percentile name (e.g. 'p95') to value in ms. Empty if there are no samples.
+        """
+
+        ordered = sorted(samples)
+        if not ordered:
+            return {}
+
+        return {f'p{p}': ordered[min(len(ordered) - 1, len(ordered)*p//100)]*1000 for p in self.percentiles}
+
+    def get_report(self) -> dict:
+        """Gets the rolling frame time percentiles and the per handler breakdown, slowest handler first.
+
+        Returns:
+            dict: Report with 'ticks', 'frame_ms' and 'handlers_ms'.
+        """
+
+        handlers = {name: self.get_percentiles(times) for name, times in self.handler_times.items()}
+        return {
+            'ticks': len(self.frame_times),
+            'frame_ms': self.get_percentiles(self.frame_times),
+            'handlers_ms': dict(sorted(handlers.items(), key=lambda item: -item[1].get('p95', 0))),
+        }
+
+    def get_overlay_text(self, handler_count: int = 5) -> str:
+        """Gets a short text summary of the report for the on-screen overlay.
+
+        Args:
+            handler_count (int, optional): Number of slowest handlers to list. Defaults to 5.
+
+        Returns:
+            str: Summary text.
+        """
+
+        report = self.get_report()
+        lines = ['frame ' + ' '.join(f'{name} {value:.1f}' for name, value in report['frame_ms'].items()) + ' ms']
+        for name, values in list(report['handlers_ms'].items())[:handler_count]:
+            lines.append(f'{name}: p95 {values["p95"]:.2f} ms')
+        return '\n'.join(lines)
+
+    def dump(self) -> None:
+        """Write the report to output_file, if profiling was enabled with one.
+        """
+
+        if not self.enabled or not self.output_file:
+            return
+
+        with open(self.output_file, 'w') as f:
+            json.dump(self.get_report(), f, indent=4)
+
+
+# Shared by the whole process, enabled by main.py with --trace-startup or the CDT1D_TRACE_STARTUP environment variable
+startup_tracer = StartupTracer()
@@ -0,0 +1,101 @@
+# RNG
+import random
+
+# Recently served words
+from collections import OrderedDict
+
+# Better type hinting
+from typing import *
+
+# Index sampling
+from wordbank import sample_indices
+
+
+class WordRotation():
+    """Picks the words of each round, preferring words that were not served recently, so players on a shared
+    computer do not see the same few words every round.
+
+    Recently served words are remembered per key, e.g. (theme, difficulty) or (theme, difficulty, player name).
+    A word only counts as served once it is actually asked (mark_served), so words drawn for a round that ended early
+    stay unseen.
+    Each history is an LRU capped at a fraction of its word list, so at least the rest of the list is always unseen
+    and a round stays O(k): words are drawn by index sampling, seen ones are passed over, and the number of draws
+    is capped. Only the most recently used histories are kept.
+
+    Members:
+        history_fraction (float): Largest fraction of a word list remembered as recently served.
+        draws_per_word (int): Words drawn per word needed before settling for recently served ones.
+        max_histories (int): Number of keys (e.g. players) whose history is kept.
+        histories (OrderedDict): Recently served words of each key, least recently used key first.
+                                 Each history is an OrderedDict of words, least recently served first.
+        rng (random.Random): Random number generator. Defaults to the random module.
+    """
+
+    def __init__(self, history_fraction: float = 0.5, draws_per_word: int = 4, max_histories: int = 64, rng: random.Random = random):
+        self.history_fraction = history_fraction
+        self.draws_per_word = draws_per_word
+        self.max_histories = max_histories
+        self.histories = OrderedDict()
+        self.rng = rng
+
+    def get_history(self, key: Hashable) -> OrderedDict:
+        """Gets the recently served words of a key, forgetting the least recently used key if there are too many.
+
+        Args:
+            key (Hashable): History key.
+
+        Returns:
+            OrderedDict: Recently served words, least recently served first.
+        """
+
+        if key in self.histories:
+            self.histories.move_to_end(key)
+        else:
+            self.histories[key] = OrderedDict()
+            if len(self.histories) > self.max_histories:
+                self.histories.popitem(last=False)
+
+        return self.histories[key]
+
+    def draw(self, words: Sequence[str], count: int, key: Hashable) -> List[str]:
+        """Pick distinct words for a round, unseen ones first. The words are not remembered until they are marked as served.
+
+        Args:
+            words (Sequence[str]): Word list to pick from. Only read.
+            count (int): Number of words to pick.
+            key (Hashable): History key, e.g. (theme, difficulty) or (theme, difficulty, player name).
+
+        Returns:
+            List[str]: Picked words, in question order.
+        """
+
+        count = min(count, len(words))
+        history = self.get_history(key)
+
+        unseen, seen = [], []
+        for draws, index in enumerate(sample_indices(len(words), len(words), self.rng)):
+            if len(unseen) == count or draws >= count*self.draws_per_word:
+                break
+
+            word = words[index]
+            (seen if word in history else unseen).append(word)
+
+        # Settle for the recently served words that were drawn if not enough unseen ones turned up
+        return unseen + seen[:count - len(unseen)]
+
+    def mark_served(self, word: str, key: Hashable, list_size: int) -> None:
+        """Remember a word as served, dropping the least recently served past the cap.
+
+        Args:
+            word (str): Word that was asked.
+            key (Hashable): History key the word was drawn with.
+            list_size (int): Size of the word list the word was drawn from.
+        """
+
+        history = self.get_history(key)
+        history.pop(word, None)
+        history[word] = None
+
+        limit = int(list_size*self.history_fraction)
+        while len(history) > limit:
+            history.popitem(last=False)
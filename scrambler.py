@@ -0,0 +1,131 @@
+# RNG
+import random
+
+# Better type hinting
+from typing import *
+
+
+class WordScrambler():
+    """Scrambles words in bounded time, and keeps a pool of ready-made scrambles for each word
+    so that starting a round does no shuffling work.
+
+    A scramble never spells the original word (ignoring case). Words made of a single repeated letter
+    can not be scrambled at all, they are listed in unscramblable when prepared. Given is_word, scrambles that
+    spell another real word are also avoided, as far as a few retries allow.
+
+    Members:
+        pool_size (int): Maximum number of distinct scrambles kept for each word.
+        pool (Dict[str, List[str]]): Ready-made scrambles for each prepared word.
+        unscramblable (List[str]): Prepared words that can not be scrambled.
+        rng (random.Random): Random number generator. Defaults to the random module.
+        is_word (Callable[[str], bool]): Checks whether a scramble is a real word. None to allow any scramble.
+        word_retries (int): Extra swaps tried when a scramble spells a real word.
+    """
+
+    word_retries: int = 4
+
+    def __init__(self, pool_size: int = 8, rng: random.Random = random, is_word: Callable[[str], bool] = None):
+        self.pool_size = pool_size
+        self.pool = {}
+        self.unscramblable = []
+        self.rng = rng
+        self.is_word = is_word
+
+    def can_scramble(self, word: str) -> bool:
+        """Check whether a word has any scramble that is not the word itself.
+
+        Args:
+            word (str): Input word.
+
+        Returns:
+            bool: Whether the word has at least two different letters.
+        """
+
+        return len(set(word.lower())) > 1
+
+    def scramble(self, word: str) -> str:
+        """Shuffle letters in a word. Takes one shuffle and a bounded number of swaps.
+
+        Args:
+            word (str): Input word.
+
+        Raises:
+            ValueError: If the word can not be scrambled.
+
+        Returns:
+            str: Shuffled word.
+        """
+
+        if not self.can_scramble(word):
+            raise ValueError(f'Word can not be scrambled: {word}')
+
+        letters = list(word)
+        self.rng.shuffle(letters)
+
+        # Spelt another real word, e.g. an anagram in the word bank. Swap letters a few times to break it up.
+        for _ in range(self.word_retries if self.is_word else 0):
+            scrambled = ''.join(letters)
+            if scrambled.lower() == word.lower() or not self.is_word(scrambled):
+                break
+            self.swap_letters(letters)
+
+        if ''.join(letters).lower() == word.lower():
+            # Shuffled back into the word. Swapping two different letters is guaranteed to break it up.
+            self.swap_letters(letters)
+
+        return ''.join(letters)
+
+    def swap_letters(self, letters: List[str]) -> None:
+        """Swap two different letters at random, in place. The letters must not all be the same.
+        """
+
+        i = self.rng.randrange(len(letters))
+        j = self.rng.choice([j for j, char in enumerate(letters) if char.lower() != letters[i].lower()])
+        letters[i], letters[j] = letters[j], letters[i]
+
+    def prepare(self, words: Iterable[str]) -> None:
+        """Fill the pool with distinct scrambles for each word. Words already in the pool are skipped.
+
+        Args:
+            words (Iterable[str]): Words to prepare.
+        """
+
+        for word in words:
+            if word in self.pool or word in self.unscramblable:
+                continue
+
+            if not self.can_scramble(word):
+                self.unscramblable.append(word)
+                continue
+
+            # Short words may have fewer distinct scrambles than the pool size, so the attempts are capped
+            scrambles = set()
+            for _ in range(self.pool_size*4):
+                scrambles.add(self.scramble(word))
+                if len(scrambles) == self.pool_size:
+                    break
+
+            # Drop scrambles that spell real words, unless that leaves none
+            if self.is_word:
+                scrambles = {scrambled for scrambled in scrambles if not self.is_word(scrambled)} or scrambles
+
+            self.pool[word] = sorted(scrambles)
+
+    def get_scramble(self, word: str) -> str:
+        """Get a scramble of a word, from the pool if it was prepared.
+
+        Args:
+            word (str): Input word.
+
+        Returns:
+            str: Shuffled word. The word itself if it can not be scrambled.
+        """
+
+        scrambles = self.pool.get(word)
+        if scrambles:
+            return self.rng.choice(scrambles)
+
+        if not self.can_scramble(word):
+            return word
+
+        return self.scramble(word)
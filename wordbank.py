@@ -0,0 +1,607 @@
+"""
+Word bank engine. Loads the word lists from wordbanks/<theme>.csv (columns: word, difficulty, rarity) into one
+compact index, and memory-maps a prebuilt binary copy of that index so startup does not parse the word lists.
+
+Words with no difficulty in their word list are sorted into a difficulty tier by their features (length, letter
+entropy, number of distinct scrambles, repeated letters) when the index is built, so new word lists need no hand-sorting.
+
+Usage:
+    python wordbank.py wordbanks                (rebuilds wordbanks/index.wbi after editing the word lists)
+    python wordbank.py wordbanks --report       (also lists the features and difficulty score of every word)
+"""
+
+# Command line interface
+import argparse
+
+# Word list files and the binary index
+import csv
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+# Word features
+import math
+from bisect import bisect_right
+from collections import Counter
+
+# RNG
+import random
+
+# Better type hinting
+from typing import *
+from collections.abc import Sequence
+
+
+class WordFeatures(NamedTuple):
+    """Features of a word that make it harder to unscramble. Letters are compared ignoring case.
+
+    Members:
+        length (int): Number of letters.
+        entropy (float): Shannon entropy of the letters in bits, higher when the letters are more varied.
+        distinct_scrambles (float): Number of different scrambles that are not the word itself.
+        repeated_ratio (float): Fraction of letters that repeat an earlier letter.
+    """
+
+    length: int
+    entropy: float
+    distinct_scrambles: float
+    repeated_ratio: float
+
+
+def get_word_features(word: str) -> WordFeatures:
+    """Compute the features of a word.
+
+    Args:
+        word (str): Input word.
+
+    Returns:
+        WordFeatures: Features of the word.
+    """
+
+    counts = Counter(word.lower())
+    length = len(word)
+
+    entropy = -sum(count/length*math.log2(count/length) for count in counts.values())
+
+    # Arrangements of a multiset of letters: n!/(c1!c2!...), less the word itself
+    arrangements = math.factorial(length)
+    for count in counts.values():
+        arrangements //= math.factorial(count)
+
+    return WordFeatures(length, entropy, float(arrangements - 1), 1 - len(counts)/length if length else 0.0)
+
+
+def get_difficulty_score(features: WordFeatures) -> float:
+    """Combine the features of a word into one score, higher is harder. Each extra letter and bit of entropy adds 1,
+    every 4 doublings of the distinct scrambles add 1, and repeated letters take away up to 2, since they make
+    the word easier to spot.
+
+    Args:
+        features (WordFeatures): Features of the word.
+
+    Returns:
+        float: Difficulty score.
+    """
+
+    return (features.length + features.entropy + math.log2(features.distinct_scrambles + 1)/4
+            - 2*features.repeated_ratio)
+
+
+def get_signature(word: str) -> str:
+    """Gets the anagram signature of a word: its letters sorted, ignoring case. Anagrams share a signature.
+
+    Args:
+        word (str): Input word.
+
+    Returns:
+        str: Anagram signature.
+    """
+
+    return ''.join(sorted(word.lower()))
+
+
+def sample_indices(population: int, count: int, rng: random.Random = random) -> Iterator[int]:
+    """Draw distinct random indices from range(population), one at a time, without building or shuffling the range.
+    A partial Fisher-Yates shuffle, where only the swapped positions are remembered in a dict, so drawing
+    count indices takes O(count) time and memory however big the population is.
+
+    Args:
+        population (int): Number of indices to draw from.
+        count (int): Number of indices to draw, at most population.
+        rng (random.Random, optional): Random number generator. Defaults to the random module.
+
+    Yields:
+        int: Next random index, never one drawn before.
+    """
+
+    swapped = {} # Position -> index moved there, every position not in here still holds its own index
+    for position in range(min(count, population)):
+        target = rng.randrange(position, population)
+        yield swapped.get(target, target)
+        swapped[target] = swapped.get(position, position)
+
+
+class WordGroup(Sequence):
+    """Read-only view of the words under one key of a WordBank. Words are decoded when they are read,
+    nothing is copied, and a random word can be picked in O(1).
+
+    Members:
+        bank (WordBank): Word bank the words are in.
+        start (int): Index of the first word in the bank.
+        stop (int): Index after the last word in the bank.
+    """
+
+    def __init__(self, bank: 'WordBank', start: int, stop: int):
+        self.bank = bank
+        self.start, self.stop = start, stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, 'WordGroup', List[str]]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return WordGroup(self.bank, self.start + start, self.start + max(start, stop))
+            return [self[i] for i in range(start, stop, step)]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('word index out of range')
+
+        return self.bank.get_word(self.start + index)
+
+    def __repr__(self) -> str:
+        return f'WordGroup({len(self)} words)'
+
+    def choice(self, rng: random.Random = random) -> str:
+        """Pick a random word.
+
+        Args:
+            rng (random.Random, optional): Random number generator. Defaults to the random module.
+
+        Returns:
+            str: Random word of the group.
+        """
+
+        return self.bank.get_word(self.start + rng.randrange(len(self)))
+
+    def sample(self, count: int, rng: random.Random = random) -> Iterator[str]:
+        """Draw distinct random words one at a time, in O(count) time however big the group is. See sample_indices.
+
+        Args:
+            count (int): Number of words to draw, at most the size of the group.
+            rng (random.Random, optional): Random number generator. Defaults to the random module.
+
+        Yields:
+            str: Next random word.
+        """
+
+        for index in sample_indices(len(self), count, rng):
+            yield self.bank.get_word(self.start + index)
+
+
+class WordBank():
+    """Words of every theme packed into one index.
+
+    Words are sorted by (theme, difficulty, length, rarity), so the words under any leading part of that key
+    (e.g. theme and difficulty) sit next to each other and are looked up as one range. The index is a single
+    buffer, which is what gets written to and memory-mapped from the .wbi file:
+
+        magic (8 bytes) | header length (uint32) | JSON header | word offsets (uint32 * (count + 1))
+            | word features (float32 * 4 * count) | UTF-8 words
+
+    Members:
+        buffer (memoryview): Whole index.
+        header (dict): Word count, key ranges, difficulty tier boundaries, words left out because they can not be scrambled,
+                       and the checksum and file stats of the word lists it was built from.
+        ranges (Dict[tuple, Tuple[int, int]]): (start, stop) word indices of every key.
+        tier_scores (Dict[str, List[float]]): Lowest difficulty score of each tier above the first, for each theme.
+        anagram_indexes (Dict[str, Dict[str, Set[str]]]): Lowercase words of each theme by anagram signature.
+                                                           Each theme's index is built the first time it is used.
+        offsets (memoryview): Byte offset of every word in the word data.
+        features (memoryview): WordFeatures of every word, flattened.
+        words (memoryview): UTF-8 word data.
+    """
+
+    magic: bytes = b'CDTWORDS'
+    index_format: int = 4 # Bumped whenever the index layout changes, older index files are rebuilt
+    index_file_name: str = 'index.wbi'
+    key_fields: Tuple[str, ...] = ('theme', 'difficulty', 'length', 'rarity')
+    difficulty_tiers: int = 3 # Tiers words with no difficulty are sorted into, numbered from 1
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap]):
+        self.source = buffer # Keep the mapping alive
+        self.buffer = memoryview(buffer)
+
+        if bytes(self.buffer[:8]) != self.magic:
+            raise ValueError('Not a word bank index')
+
+        header_length, = struct.unpack_from('<I', self.buffer, 8)
+        header_end = 12 + header_length
+        self.header = json.loads(bytes(self.buffer[12:header_end]))
+
+        if self.header.get('format') != self.index_format:
+            raise ValueError('Word bank index is out of date')
+
+        count = self.header['count']
+        offsets_end = header_end + (count + 1)*4
+        features_end = offsets_end + count*len(WordFeatures._fields)*4
+        if len(self.buffer) < features_end:
+            raise ValueError('Word bank index is truncated')
+        self.offsets = self.get_array(self.buffer[header_end:offsets_end], 'I')
+        self.features = self.get_array(self.buffer[offsets_end:features_end], 'f')
+        self.words = self.buffer[features_end:]
+        if len(self.words) != self.offsets[count]:
+            raise ValueError('Word bank index is truncated')
+
+        self.ranges = {tuple(key): (start, stop) for key, start, stop in self.header['ranges']}
+        self.tier_scores = self.header['tier_scores']
+        self.anagram_indexes = {}
+
+    @staticmethod
+    def get_array(data: memoryview, typecode: str) -> memoryview:
+        """View little-endian index data as an array of numbers.
+        """
+
+        if sys.byteorder == 'little':
+            return data.cast(typecode)
+
+        swapped = array(typecode, data.tobytes())
+        swapped.byteswap()
+        return memoryview(swapped)
+
+    def __len__(self) -> int:
+        return self.header['count']
+
+    def get_word(self, index: int) -> str:
+        """Gets a word by its index in the bank.
+
+        Args:
+            index (int): Word index.
+
+        Returns:
+            str: Word.
+        """
+
+        return str(self.words[self.offsets[index]:self.offsets[index + 1]], 'utf-8')
+
+    def get_features(self, index: int) -> WordFeatures:
+        """Gets the precomputed features of a word by its index in the bank.
+
+        Args:
+            index (int): Word index.
+
+        Returns:
+            WordFeatures: Features of the word.
+        """
+
+        field_count = len(WordFeatures._fields)
+        length, entropy, distinct_scrambles, repeated_ratio = self.features[index*field_count:(index + 1)*field_count]
+        return WordFeatures(int(length), entropy, distinct_scrambles, repeated_ratio)
+
+    def get_anagram_index(self, theme: str) -> Dict[str, Set[str]]:
+        """Gets the anagram signature index of a theme, building it the first time it is needed.
+
+        Args:
+            theme (str): Word theme.
+
+        Returns:
+            Dict[str, Set[str]]: Lowercase words of the theme by anagram signature.
+        """
+
+        if theme not in self.anagram_indexes:
+            anagram_index = {}
+            for word in self.group(theme):
+                anagram_index.setdefault(get_signature(word), set()).add(word.lower())
+            self.anagram_indexes[theme] = anagram_index
+
+        return self.anagram_indexes[theme]
+
+    def get_anagrams(self, word: str, theme: str) -> Set[str]:
+        """Gets the words of a theme spelt with the same letters as a word (including the word itself if it is in the theme).
+
+        Args:
+            word (str): Input word.
+            theme (str): Word theme.
+
+        Returns:
+            Set[str]: Lowercase anagrams in the theme. Do not modify.
+        """
+
+        return self.get_anagram_index(theme).get(get_signature(word), set())
+
+    def is_word(self, text: str, theme: str) -> bool:
+        """Check whether some text is a word of a theme, ignoring case.
+
+        Args:
+            text (str): Input text.
+            theme (str): Word theme.
+
+        Returns:
+            bool: Whether the text is a word of the theme.
+        """
+
+        return text.lower() in self.get_anagrams(text, theme)
+
+    def classify(self, theme: str, word: str) -> int:
+        """Gets the difficulty tier a word would be sorted into in a theme, by its features.
+
+        Args:
+            theme (str): Word theme.
+            word (str): Input word.
+
+        Returns:
+            int: Difficulty tier, from 1.
+        """
+
+        return bisect_right(self.tier_scores.get(theme, []), get_difficulty_score(get_word_features(word))) + 1
+
+    def group(self, theme: str, difficulty: int = None, length: int = None, rarity: int = None) -> WordGroup:
+        """Gets the words under a key. Leave out the trailing parts of the key to get everything under them,
+        e.g. group('animals', 2) for every medium animal. O(1), no words are copied.
+
+        Args:
+            theme (str): Word theme.
+            difficulty (int, optional): Difficulty. Defaults to None (every difficulty).
+            length (int, optional): Word length. Defaults to None (every length).
+            rarity (int, optional): Rarity. Defaults to None (every rarity).
+
+        Raises:
+            ValueError: If a part of the key is given after one that is left out.
+
+        Returns:
+            WordGroup: Words under the key. Empty if there are none.
+        """
+
+        key = [theme, difficulty, length, rarity]
+        while key and key[-1] is None:
+            key.pop()
+        if None in key:
+            raise ValueError(f'Word bank keys go {self.key_fields}, only trailing parts can be left out')
+
+        start, stop = self.ranges.get(tuple(key), (0, 0))
+        return WordGroup(self, start, stop)
+
+    def get_themes(self) -> List[str]:
+        """Gets every theme in the bank.
+
+        Returns:
+            List[str]: Theme names.
+        """
+
+        return [key[0] for key in self.ranges if len(key) == 1]
+
+    """
+    -----------------------------------------------------------------------------------------------------------------------------------------------
+    BUILDING AND LOADING
+    -----------------------------------------------------------------------------------------------------------------------------------------------
+    """
+
+    @classmethod
+    def get_tier_scores(cls, scores: List[float]) -> List[float]:
+        """Split difficulty scores into equally sized tiers.
+
+        Args:
+            scores (List[float]): Difficulty scores of every word of a theme.
+
+        Returns:
+            List[float]: Lowest score of each tier above the first.
+        """
+
+        ordered = sorted(scores)
+        return [ordered[len(ordered)*tier//cls.difficulty_tiers] for tier in range(1, cls.difficulty_tiers)] if ordered else []
+
+    @classmethod
+    def build(cls, entries: Iterable[Tuple[str, str, Optional[int], int]], checksum: str = '', source_stats: Dict[str, List[int]] = None) -> 'WordBank':
+        """Build an index in memory. Words with no difficulty are sorted into a tier by their difficulty score,
+        with the tier boundaries splitting the words of their theme into equally sized tiers. Words with no scramble
+        other than themselves (e.g. a single repeated letter) are left out, they would show the answer as the question.
+
+        Args:
+            entries (Iterable[Tuple[str, str, Optional[int], int]]): (theme, word, difficulty, rarity) of every word.
+                The difficulty is None to classify the word.
+            checksum (str, optional): Checksum of the word lists the entries came from. Defaults to ''.
+            source_stats (Dict[str, List[int]], optional): File stats of the word lists, see get_source_stats. Defaults to None.
+
+        Returns:
+            WordBank: Word bank over the new index.
+        """
+
+        # Score every word, then find the tier boundaries of each theme
+        entries = [(theme, word, difficulty, rarity, get_word_features(word)) for theme, word, difficulty, rarity in entries]
+
+        unscramblable = [word for theme, word, difficulty, rarity, features in entries if not features.distinct_scrambles]
+        entries = [entry for entry in entries if entry[4].distinct_scrambles]
+
+        theme_scores = {}
+        for theme, word, difficulty, rarity, features in entries:
+            theme_scores.setdefault(theme, []).append(get_difficulty_score(features))
+        tier_scores = {theme: cls.get_tier_scores(scores) for theme, scores in theme_scores.items()}
+
+        # Sort by the full key, so every key prefix is one contiguous range
+        keyed = []
+        for theme, word, difficulty, rarity, features in entries:
+            if difficulty is None:
+                difficulty = bisect_right(tier_scores[theme], get_difficulty_score(features)) + 1
+            keyed.append(((theme, difficulty, len(word), rarity), word, features))
+        keyed.sort()
+
+        ranges = {}
+        offsets = array('I', [0])
+        features_data = array('f')
+        words = bytearray()
+        for index, (key, word, features) in enumerate(keyed):
+            for prefix_length in range(1, len(key) + 1):
+                prefix = key[:prefix_length]
+                start, _ = ranges.get(prefix, (index, index))
+                ranges[prefix] = (start, index + 1)
+
+            words += word.encode('utf-8')
+            offsets.append(len(words))
+            features_data.extend(features)
+
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+            features_data.byteswap()
+
+        header = json.dumps({
+            'format': cls.index_format,
+            'unscramblable': unscramblable,
+            'count': len(keyed),
+            'checksum': checksum,
+            'source_stats': source_stats or {},
+            'ranges': [[list(key), start, stop] for key, (start, stop) in ranges.items()],
+            'tier_scores': tier_scores,
+        }).encode('utf-8')
+
+        return cls(cls.magic + struct.pack('<I', len(header)) + header + offsets.tobytes() + features_data.tobytes() + bytes(words))
+
+    @staticmethod
+    def get_source_files(directory: str) -> List[str]:
+        """Gets the word list files of a word bank directory, one per theme.
+        """
+        return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.csv'))
+
+    @classmethod
+    def get_source_stats(cls, directory: str) -> Dict[str, List[int]]:
+        """Size and modification time of every word list in a directory. Cheap to get, so a prebuilt index
+        that is up to date is found without reading the word lists.
+        """
+
+        stats = {}
+        for path in cls.get_source_files(directory):
+            stat = os.stat(path)
+            stats[os.path.basename(path)] = [stat.st_size, stat.st_mtime_ns]
+        return stats
+
+    @classmethod
+    def get_checksum(cls, directory: str) -> str:
+        """Checksum of every word list in a directory, to tell whether a prebuilt index is up to date.
+        """
+
+        digest = hashlib.sha1()
+        for path in cls.get_source_files(directory):
+            digest.update(os.path.basename(path).encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    @classmethod
+    def read_sources(cls, directory: str) -> Iterator[Tuple[str, str, Optional[int], int]]:
+        """Read the word lists of a directory. The theme is the file name, rows with no word are skipped.
+        The difficulty and rarity columns can be left empty or out.
+
+        Args:
+            directory (str): Word bank directory.
+
+        Yields:
+            Tuple[str, str, Optional[int], int]: (theme, word, difficulty, rarity) of every word. The difficulty is None if not given.
+        """
+
+        for path in cls.get_source_files(directory):
+            theme = os.path.splitext(os.path.basename(path))[0]
+            with open(path, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    word = (row.get('word') or '').strip()
+                    if word:
+                        difficulty = (row.get('difficulty') or '').strip()
+                        yield theme, word, int(difficulty) if difficulty else None, int(row.get('rarity') or 0)
+
+    @classmethod
+    def open_index(cls, path: str) -> 'WordBank':
+        """Memory-map a prebuilt index file.
+
+        Args:
+            path (str): File path of the index.
+
+        Returns:
+            WordBank: Word bank over the mapped index.
+        """
+
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def load(cls, directory: str) -> 'WordBank':
+        """Load the word bank of a directory. Memory-maps the prebuilt index if it is up to date with the word lists,
+        otherwise reads the word lists. The word lists are only hashed if their sizes or modification times
+        differ from when the index was built (e.g. after a fresh checkout).
+
+        If the index had to be rebuilt, or only its recorded sizes and modification times were out of date,
+        it is saved again so the next launch maps it straight away. A read-only directory just logs that the index is stale.
+
+        Args:
+            directory (str): Word bank directory.
+
+        Returns:
+            WordBank: Loaded word bank.
+        """
+
+        source_stats = cls.get_source_stats(directory)
+        index_file = os.path.join(directory, cls.index_file_name)
+        checksum = None
+
+        if os.path.exists(index_file):
+            try:
+                bank = cls.open_index(index_file)
+                if bank.header['source_stats'] == source_stats:
+                    return bank
+
+                checksum = cls.get_checksum(directory)
+                if bank.header['checksum'] == checksum and not os.access(directory, os.W_OK):
+                    return bank # Up to date, but the new sizes and modification times can not be recorded
+            except (ValueError, KeyError, struct.error, OSError) as e:
+                print("Word bank index ignored:", e)
+            bank = None # Unmap before the file is replaced
+
+        if checksum is None:
+            checksum = cls.get_checksum(directory)
+        bank = cls.build(cls.read_sources(directory), checksum, source_stats)
+
+        try:
+            bank.write_index(index_file)
+        except OSError as e:
+            print("Word bank index is stale and could not be saved:", e)
+
+        return bank
+
+    def write_index(self, path: str) -> None:
+        """Write the index to a file, replacing it in one step so a running game never maps a half-written file.
+
+        Args:
+            path (str): File path to write to.
+        """
+
+        with open(path + '.tmp', 'wb') as f:
+            f.write(self.buffer)
+        os.replace(path + '.tmp', path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the binary index of a word bank directory.')
+    parser.add_argument('directory', nargs='?', default='wordbanks', help='word bank directory (default: wordbanks)')
+    parser.add_argument('--report', action='store_true', help='list the features, difficulty score and tier of every word')
+    args = parser.parse_args()
+
+    bank = WordBank.build(WordBank.read_sources(args.directory), WordBank.get_checksum(args.directory),
+                          WordBank.get_source_stats(args.directory))
+    bank.write_index(os.path.join(args.directory, WordBank.index_file_name))
+    print(f'{len(bank)} words in {len(bank.get_themes())} themes indexed')
+    if bank.header['unscramblable']:
+        print('Left out, can not be scrambled:', ', '.join(bank.header['unscramblable']))
+
+    if args.report:
+        print(f'{"theme":<12}{"word":<16}{"length":>7}{"entropy":>9}{"scrambles":>12}{"repeated":>10}{"score":>8}{"tier":>6}{"listed":>8}')
+        for theme in bank.get_themes():
+            for difficulty in range(1, bank.difficulty_tiers + 1):
+                start = bank.group(theme, difficulty).start
+                for index, word in enumerate(bank.group(theme, difficulty), start):
+                    features = bank.get_features(index)
+                    print(f'{theme:<12}{word:<16}{features.length:>7}{features.entropy:>9.2f}{features.distinct_scrambles:>12.0f}'
+                          f'{features.repeated_ratio:>10.2f}{get_difficulty_score(features):>8.2f}{bank.classify(theme, word):>6}{difficulty:>8}')
@@ -1,6 +1,12 @@
-easyword = ["Tiger", "Horse", "Whale","Zebra","Mouse","Moose","Camel","Koala","Hyena","Snake","Cobra","Rhino","Otter","Bison","Panda","Sloth","Eagle","Goose","Snail","Skunk","Prawn","Squid","Quail","Robin","Crane"]
+# Word banks, loaded from wordbanks/<theme>.csv
+import os
 
-medword = ["Bulldog","Catfish","Cheetah","Chicken","Dolphin","Giraffe","Gorilla","Hamster","Leopard","Lobster","Meerkat","Octopus","Ostrich","Peacock","Pelican","Penguin",
-"Piranha","Raccoon","Vulture","Wallaby","Sparrow","Panther","Buffalo","Seagull","Mammoth"]
+from wordbank import WordBank
 
-hardword =["Alligator","Albatross","Butterfly","Barracuda","Centipede","Chameleon","Chihuahua","Crocodile","Dalmatian","Dragonfly","Jellyfish","Millipede","Porcupine","Wolverine","Chimpanzee","Armadillo","Salamander","Wildebeest","Chinchilla","Nightingale","Hummingbird","Bloodhound","Rhinoceros","Rattlesnake","Grasshopper"]
\ No newline at end of file
+
+word_bank = WordBank.load(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wordbanks'))
+
+# Read-only views of the original animal lists, by difficulty
+easyword = word_bank.group('animals', 1)
+medword = word_bank.group('animals', 2)
+hardword = word_bank.group('animals', 3)